@@ -0,0 +1,468 @@
+"""
+Streaming bulk import and export of users, projects, tasks and project memberships.
+
+Records are NDJSON objects or CSV rows with the fields listed in `ENTITIES`.
+Users are identified by email, so projects and memberships refer to them by
+`owner_email` / `user_email`. Projects and tasks keep their ids, which the
+tasks and memberships refer to. Import order is therefore users, projects,
+tasks, memberships.
+
+Both directions work on `batch_size` records at a time. Exports page through
+the tables by primary key. Imports resolve the references of each chunk with one
+`IN` lookup per referenced table, skip rows that already exist and reject rows
+whose references are missing. Each chunk is inserted in its own transaction,
+with COPY on PostgreSQL (psycopg2) and multi-row INSERTs elsewhere. Because
+existing rows are skipped, an import can always be re-run; with a checkpoint
+file it also resumes after the last committed chunk instead of re-reading
+everything.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.engine import Connection, Engine
+from app import models
+
+DEFAULT_BATCH_SIZE = 10000
+
+User = models.User.__table__
+Project = models.Project.__table__
+Task = models.Task.__table__
+ProjectUsers = models.project_users
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "t", "yes")
+
+
+def _to_optional_str(value) -> Optional[str]:
+    return None if value in (None, "") else str(value)
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+class Field:
+    def __init__(self, name: str, parse: Callable = str, default=None, required: bool = True):
+        self.name = name
+        self.parse = parse
+        self.default = default
+        self.required = required
+
+
+class Entity:
+    def __init__(self, name: str, fields: List[Field], export_statement, key_columns):
+        self.name = name
+        self.fields = fields
+        self.export_statement = export_statement
+        self.key_columns = key_columns
+
+    @property
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields]
+
+
+ENTITIES: Dict[str, Entity] = {
+    entity.name: entity
+    for entity in (
+        Entity(
+            "users",
+            [
+                Field("username"),
+                Field("email"),
+                Field("hashed_password"),
+                Field("role", default="user", required=False),
+                Field("is_active", _to_bool, default=True, required=False),
+                Field("is_subscribed", _to_bool, default=False, required=False),
+                Field("subscription_end_date", _to_datetime, required=False),
+            ],
+            select(
+                User.c.id, User.c.username, User.c.email, User.c.hashed_password, User.c.role,
+                User.c.is_active, User.c.is_subscribed, User.c.subscription_end_date,
+            ),
+            [User.c.id],
+        ),
+        Entity(
+            "projects",
+            [
+                Field("id", int),
+                Field("title"),
+                Field("description", _to_optional_str, required=False),
+                Field("owner_email"),
+            ],
+            select(Project.c.id, Project.c.title, Project.c.description, User.c.email.label("owner_email"))
+            .join(User, User.c.id == Project.c.owner_id),
+            [Project.c.id],
+        ),
+        Entity(
+            "tasks",
+            [
+                Field("id", int),
+                Field("title"),
+                Field("description", _to_optional_str, required=False),
+                Field("is_completed", _to_bool, default=False, required=False),
+                Field("project_id", int),
+            ],
+            select(Task.c.id, Task.c.title, Task.c.description, Task.c.is_completed, Task.c.project_id),
+            [Task.c.id],
+        ),
+        Entity(
+            "memberships",
+            [
+                Field("project_id", int),
+                Field("user_email"),
+            ],
+            select(ProjectUsers.c.project_id, ProjectUsers.c.user_id, User.c.email.label("user_email"))
+            .join(User, User.c.id == ProjectUsers.c.user_id),
+            [ProjectUsers.c.project_id, ProjectUsers.c.user_id],
+        ),
+    )
+}
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Export
+
+def iter_export(connection: Connection, entity: Entity, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Yields every record of `entity`, reading `batch_size` rows per query in primary key order.
+    """
+    last_key = None
+    while True:
+        statement = entity.export_statement.order_by(*entity.key_columns).limit(batch_size)
+        if last_key is not None:
+            statement = statement.where(tuple_(*entity.key_columns) > tuple_(*last_key))
+        rows = connection.execute(statement).mappings().all()
+        if not rows:
+            return
+        for row in rows:
+            yield {name: row[name] for name in entity.field_names}
+        last_key = [rows[-1][column.name] for column in entity.key_columns]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_records(records: Iterable[dict], entity: Entity, fmt: str) -> Iterator[str]:
+    """
+    Yields `records` serialized as NDJSON lines, CSV rows (after a header row) or the
+    pieces of one JSON array.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(entity.field_names)
+        for record in records:
+            writer.writerow([_csv_value(record[name]) for name in entity.field_names])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    elif fmt == "json":
+        separator = "["
+        for record in records:
+            yield separator + json.dumps(record, default=_json_default, separators=(",", ":"))
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+    else:
+        for record in records:
+            yield json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def write_records(records: Iterable[dict], entity: Entity, output: TextIO, fmt: str) -> int:
+    """
+    Writes `records` to `output` as NDJSON or CSV and returns how many were written.
+    """
+    written = 0
+
+    def counted(records):
+        nonlocal written
+        for record in records:
+            written += 1
+            yield record
+
+    for piece in encode_records(counted(records), entity, fmt):
+        if piece:
+            output.write(piece)
+    return written
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# Import
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.rejected: Dict[str, int] = {}
+
+    def reject(self, reason: str, count: int = 1):
+        self.rejected[reason] = self.rejected.get(reason, 0) + count
+
+
+class Checkpoint:
+    """
+    Number of input records already committed, stored as JSON next to the import.
+    """
+
+    def __init__(self, path: Optional[str], entity: str, source: str):
+        self.path = path
+        self.entity = entity
+        self.source = os.path.abspath(source)
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as handle:
+            state = json.load(handle)
+        if state.get("entity") != self.entity or state.get("source") != self.source:
+            raise ValueError(f"Checkpoint {self.path} belongs to another import ({state.get('entity')} from {state.get('source')}).")
+        return int(state["records"])
+
+    def save(self, records: int):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"entity": self.entity, "source": self.source, "records": records}, handle)
+        os.replace(temporary, self.path)
+
+
+def read_records(handle: TextIO, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        yield from csv.DictReader(handle)
+    else:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _parse(record: dict, entity: Entity) -> dict:
+    parsed = {}
+    for field in entity.fields:
+        value = record.get(field.name)
+        if value in (None, "") and field.parse is not _to_optional_str:
+            if field.required:
+                raise ValueError(f"missing {field.name}")
+            parsed[field.name] = field.default
+        else:
+            parsed[field.name] = field.parse(value)
+    return parsed
+
+
+def _existing(connection: Connection, column, values) -> set:
+    if not values:
+        return set()
+    return set(connection.scalars(select(column).where(column.in_(values))))
+
+
+def _user_ids(connection: Connection, emails) -> Dict[str, int]:
+    if not emails:
+        return {}
+    return dict(connection.execute(select(User.c.email, User.c.id).where(User.c.email.in_(emails))).all())
+
+
+def _copy_rows(connection: Connection, table, columns: List[str], rows: List[dict]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([r"\N" if row[column] is None else _csv_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(connection: Connection, table, rows: List[dict]):
+    """
+    Inserts `rows` (dicts with identical keys) with COPY on PostgreSQL/psycopg2 and a
+    multi-row INSERT elsewhere.
+    """
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        _copy_rows(connection, table, list(rows[0]), rows)
+    else:
+        connection.execute(insert(table), rows)
+
+
+def _prepare_users(connection: Connection, records: List[dict], result: ImportResult) -> List[dict]:
+    existing = _existing(connection, User.c.email, [record["email"] for record in records])
+    taken_names = _existing(connection, User.c.username, [record["username"] for record in records])
+    rows, seen = [], set()
+    for record in records:
+        if record["email"] in existing or record["email"] in seen:
+            result.skipped += 1
+        elif record["username"] in taken_names:
+            result.reject("username already taken")
+        else:
+            seen.add(record["email"])
+            taken_names.add(record["username"])
+            rows.append(record)
+    return rows
+
+
+def _prepare_projects(connection: Connection, records: List[dict], result: ImportResult) -> List[dict]:
+    owners = _user_ids(connection, {record["owner_email"] for record in records})
+    existing = _existing(connection, Project.c.id, [record["id"] for record in records])
+    now = datetime.utcnow()
+    rows = []
+    for record in records:
+        if record["id"] in existing:
+            result.skipped += 1
+        elif record["owner_email"] not in owners:
+            result.reject("unknown owner_email")
+        else:
+            existing.add(record["id"])
+            rows.append({
+                "id": record["id"],
+                "title": record["title"],
+                "description": record["description"],
+                "owner_id": owners[record["owner_email"]],
+                "task_count": 0,
+                "completed_count": 0,
+                "version": 1,
+                "updated_at": now,
+            })
+    return rows
+
+
+def _prepare_tasks(connection: Connection, records: List[dict], result: ImportResult) -> List[dict]:
+    projects = _existing(connection, Project.c.id, {record["project_id"] for record in records})
+    existing = _existing(connection, Task.c.id, [record["id"] for record in records])
+    now = datetime.utcnow()
+    rows = []
+    for record in records:
+        if record["id"] in existing:
+            result.skipped += 1
+        elif record["project_id"] not in projects:
+            result.reject("unknown project_id")
+        else:
+            existing.add(record["id"])
+            rows.append({**record, "updated_at": now})
+    return rows
+
+
+def _prepare_memberships(connection: Connection, records: List[dict], result: ImportResult) -> List[dict]:
+    users = _user_ids(connection, {record["user_email"] for record in records})
+    projects = _existing(connection, Project.c.id, {record["project_id"] for record in records})
+    pairs = {(record["project_id"], users[record["user_email"]]) for record in records if record["user_email"] in users}
+    existing = set()
+    if pairs:
+        existing = set(
+            connection.execute(
+                select(ProjectUsers.c.project_id, ProjectUsers.c.user_id)
+                .where(tuple_(ProjectUsers.c.project_id, ProjectUsers.c.user_id).in_(pairs))
+            ).all()
+        )
+    rows = []
+    for record in records:
+        if record["user_email"] not in users:
+            result.reject("unknown user_email")
+        elif record["project_id"] not in projects:
+            result.reject("unknown project_id")
+        else:
+            pair = (record["project_id"], users[record["user_email"]])
+            if pair in existing:
+                result.skipped += 1
+            else:
+                existing.add(pair)
+                rows.append({"project_id": pair[0], "user_id": pair[1]})
+    return rows
+
+
+_IMPORTERS = {
+    "users": (User, _prepare_users),
+    "projects": (Project, _prepare_projects),
+    "tasks": (Task, _prepare_tasks),
+    "memberships": (ProjectUsers, _prepare_memberships),
+}
+
+
+def import_records(
+    engine: Engine,
+    entity: Entity,
+    records: Iterable[dict],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint: Optional[Checkpoint] = None,
+    progress: Optional[Callable[[ImportResult], None]] = None,
+) -> ImportResult:
+    """
+    Imports `records` of `entity` chunk by chunk, one transaction per chunk.
+
+    Records already counted in `checkpoint` are skipped without being parsed, and the
+    checkpoint is advanced after every committed chunk.
+    """
+    table, prepare = _IMPORTERS[entity.name]
+    result = ImportResult()
+    done = checkpoint.load() if checkpoint else 0
+    records = iter(records)
+    if done:
+        for _ in islice(records, done):
+            pass
+        result.read = done
+
+    for chunk in chunked(records, batch_size):
+        parsed = []
+        for record in chunk:
+            try:
+                parsed.append(_parse(record, entity))
+            except (ValueError, TypeError) as error:
+                result.reject(f"invalid record: {error}")
+        with engine.begin() as connection:
+            rows = prepare(connection, parsed, result)
+            insert_rows(connection, table, rows)
+        result.read += len(chunk)
+        result.inserted += len(rows)
+        if checkpoint:
+            checkpoint.save(result.read)
+        if progress:
+            progress(result)
+    return result
+
+
+def reset_sequences(engine: Engine):
+    """
+    Moves the PostgreSQL id sequences past ids inserted explicitly by an import.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in (User, Project, Task):
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            )
@@ -0,0 +1,153 @@
+"""
+Maintenance commands for the Project Management Platform backend.
+
+Usage:
+    python -m app.cli <command> [options]
+"""
+
+import argparse
+import sys
+import time
+from app import bulkio, counters, database, migrations, purge, subscriptions
+
+
+def migrate(args):
+    if args.status:
+        for revision, description, applied in migrations.status(database.engine):
+            print(f"{'applied' if applied else 'pending':<8} {revision}  {description}")
+        return
+    applied = migrations.migrate(database.engine, target=args.to)
+    print(f"Applied {len(applied)} revision(s)." if applied else "Database schema is up to date.")
+
+
+def repair_counters(args):
+    db = database.SessionLocal()
+    try:
+        processed = counters.repair_task_counters(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Recomputed task counters of {processed} projects.")
+
+
+def sweep_subscriptions(args):
+    while True:
+        expired = subscriptions.sweep()
+        print(f"Expired {expired} subscription(s).")
+        if not args.loop:
+            return
+        time.sleep(args.interval)
+
+
+def purge_projects(args):
+    while True:
+        projects_purged, tasks_purged = purge.purge()
+        print(f"Purged {projects_purged} deleted project(s) and {tasks_purged} of their task(s).")
+        if not args.loop:
+            return
+        time.sleep(args.interval)
+
+
+def _format(args, path: str) -> str:
+    if args.format:
+        return args.format
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def export_records(args):
+    entity = bulkio.ENTITIES[args.entity]
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        with database.engine.connect() as connection:
+            records = bulkio.iter_export(connection, entity, batch_size=args.batch_size)
+            written = bulkio.write_records(records, entity, output, _format(args, args.output))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Exported {written} {entity.name}.", file=sys.stderr)
+
+
+def import_records(args):
+    entity = bulkio.ENTITIES[args.entity]
+    checkpoint = bulkio.Checkpoint(args.checkpoint, entity.name, args.input)
+
+    def report(result):
+        print(f"\r{result.read} read, {result.inserted} inserted, {result.skipped} skipped", end="", file=sys.stderr)
+
+    with open(args.input, newline="", encoding="utf-8") as handle:
+        records = bulkio.read_records(handle, _format(args, args.input))
+        result = bulkio.import_records(
+            database.engine, entity, records, batch_size=args.batch_size, checkpoint=checkpoint, progress=report
+        )
+    print(file=sys.stderr)
+
+    bulkio.reset_sequences(database.engine)
+    if entity.name in ("projects", "tasks") and not args.skip_counter_repair:
+        db = database.SessionLocal()
+        try:
+            counters.repair_task_counters(db)
+        finally:
+            db.close()
+
+    print(f"Imported {result.inserted} {entity.name} ({result.skipped} already present).")
+    for reason, count in sorted(result.rejected.items()):
+        print(f"Rejected {count}: {reason}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Apply pending schema migrations.")
+    migrate_parser.add_argument("--to", metavar="REVISION", help="Stop after this revision.")
+    migrate_parser.add_argument("--status", action="store_true", help="List revisions and whether they are applied.")
+    migrate_parser.set_defaults(handler=migrate)
+
+    repair = commands.add_parser("repair-counters", help="Recompute the per-project task counters.")
+    repair.add_argument("--batch-size", type=int, default=1000, help="Projects updated per transaction.")
+    repair.set_defaults(handler=repair_counters)
+
+    sweep = commands.add_parser("sweep-subscriptions", help="Switch off subscriptions whose end date has passed.")
+    sweep.add_argument("--loop", action="store_true", help="Keep sweeping every --interval seconds.")
+    sweep.add_argument(
+        "--interval", type=float, default=subscriptions.SUBSCRIPTION_SWEEP_INTERVAL_SECONDS,
+        help="Seconds between sweeps with --loop.",
+    )
+    sweep.set_defaults(handler=sweep_subscriptions)
+
+    purge_parser = commands.add_parser("purge-projects", help="Remove soft-deleted projects and their tasks in batches.")
+    purge_parser.add_argument("--loop", action="store_true", help="Keep purging every --interval seconds.")
+    purge_parser.add_argument(
+        "--interval", type=float, default=purge.PROJECT_PURGE_INTERVAL_SECONDS,
+        help="Seconds between purges with --loop.",
+    )
+    purge_parser.set_defaults(handler=purge_projects)
+
+    export = commands.add_parser("export", help="Stream users, projects, tasks or memberships to NDJSON/CSV.")
+    export.add_argument("entity", choices=list(bulkio.ENTITIES))
+    export.add_argument("--output", "-o", default="-", help="Output file (default: stdout).")
+    export.add_argument("--format", choices=("ndjson", "csv"), help="Defaults to the output file extension.")
+    export.add_argument("--batch-size", type=int, default=bulkio.DEFAULT_BATCH_SIZE, help="Rows read per query.")
+    export.set_defaults(handler=export_records)
+
+    load = commands.add_parser(
+        "import",
+        help="Load users, projects, tasks or memberships from NDJSON/CSV.",
+        description="Import in dependency order: users, projects, tasks, memberships. Existing rows are skipped.",
+    )
+    load.add_argument("entity", choices=list(bulkio.ENTITIES))
+    load.add_argument("input", help="NDJSON or CSV file.")
+    load.add_argument("--format", choices=("ndjson", "csv"), help="Defaults to the input file extension.")
+    load.add_argument("--batch-size", type=int, default=bulkio.DEFAULT_BATCH_SIZE, help="Records per transaction.")
+    load.add_argument("--checkpoint", help="File recording progress; an interrupted import resumes from it.")
+    load.add_argument(
+        "--skip-counter-repair", action="store_true",
+        help="Do not recompute project task counters afterwards (run repair-counters once at the end instead).",
+    )
+    load.set_defaults(handler=import_records)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
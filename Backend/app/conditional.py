@@ -0,0 +1,80 @@
+"""
+Conditional GET support.
+
+Read endpoints compute a weak ETag and a Last-Modified date from a cheap version
+query before loading anything else. If the client already holds that version
+(`If-None-Match`, or `If-Modified-Since` when no ETag is sent) a bodiless 304 is
+returned without loading or serializing the payload.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def query_fingerprint(request: Request) -> str:
+    """
+    Short digest of the query string, for ETags of responses that depend on it.
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    return hashlib.blake2s(query.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Sets the validators on `response` and returns a 304 response if the client's
+    cached copy is still current, or None if the full payload must be sent.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -1,4 +1,9 @@
 SUBSCRIPTION_PLANS = {
     "monthly": 30,
     "yearly": 365
-}
\ No newline at end of file
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+MAX_BULK_TASKS = 1000
@@ -0,0 +1,120 @@
+"""
+Denormalized per-project task counters and version.
+
+`Project.task_count` and `Project.completed_count` are maintained with relative
+UPDATEs in the same transaction as every task write, so reading a project's
+progress never has to look at its tasks. The same UPDATE bumps `Project.version`,
+which also changes on project and membership edits and backs the ETags of the
+project reads and, once committed, invalidates the project's cached responses
+(see `app.projectcache`). Task writes must go through the helpers below;
+`repair_task_counters` recomputes the counters from the tasks table.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from app import models, projectcache
+
+
+def touch_project(db: Session, project_id: int, total_delta: int = 0, completed_delta: int = 0):
+    """
+    Records a change to the project: bumps its version, applies the counter deltas
+    and queues the invalidation of its cached responses.
+    """
+    projectcache.queue_project_invalidation(db, project_id)
+    db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(
+            task_count=models.Project.task_count + total_delta,
+            completed_count=models.Project.completed_count + completed_delta,
+            version=models.Project.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def set_tasks_completed(db: Session, task_ids: Iterable[int], is_completed: bool) -> Dict[int, List[int]]:
+    """
+    Sets the completion status of the given tasks, only touching rows whose status
+    actually changes, and adjusts the completed counters accordingly.
+
+    Returns the IDs of the tasks that changed, grouped by project ID.
+    """
+    changed = db.execute(
+        update(models.Task)
+        .where(models.Task.id.in_(list(task_ids)), models.Task.is_completed.is_distinct_from(is_completed))
+        .values(is_completed=is_completed)
+        .returning(models.Task.id, models.Task.project_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    by_project = defaultdict(list)
+    for task_id, project_id in changed:
+        by_project[project_id].append(task_id)
+    for project_id in sorted(by_project):
+        count = len(by_project[project_id])
+        touch_project(db, project_id, completed_delta=count if is_completed else -count)
+    return dict(by_project)
+
+
+def delete_tasks(db: Session, task_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """
+    Deletes the given tasks and decrements the counters of their projects.
+
+    Returns the IDs of the deleted tasks, grouped by project ID.
+    """
+    deleted = db.execute(
+        delete(models.Task)
+        .where(models.Task.id.in_(list(task_ids)))
+        .returning(models.Task.id, models.Task.project_id, models.Task.is_completed)
+        .execution_options(synchronize_session=False)
+    ).all()
+    by_project, completed = defaultdict(list), Counter()
+    for task_id, project_id, is_completed in deleted:
+        by_project[project_id].append(task_id)
+        if is_completed:
+            completed[project_id] += 1
+    for project_id in sorted(by_project):
+        touch_project(db, project_id, -len(by_project[project_id]), -completed[project_id])
+    return dict(by_project)
+
+
+def repair_task_counters(db: Session, batch_size: int = 1000) -> int:
+    """
+    Recomputes the counters of every project from the tasks table, `batch_size`
+    projects per transaction.
+
+    Returns the number of projects processed.
+    """
+    total_tasks = (
+        select(func.count(models.Task.id))
+        .where(models.Task.project_id == models.Project.id)
+        .scalar_subquery()
+    )
+    completed_tasks = (
+        select(func.count(models.Task.id))
+        .where(models.Task.project_id == models.Project.id, models.Task.is_completed == True)
+        .scalar_subquery()
+    )
+
+    last_id, processed = 0, 0
+    while True:
+        project_ids = db.scalars(
+            select(models.Project.id)
+            .where(models.Project.id > last_id)
+            .order_by(models.Project.id)
+            .limit(batch_size)
+        ).all()
+        if not project_ids:
+            return processed
+
+        db.execute(
+            update(models.Project)
+            .where(models.Project.id.in_(project_ids))
+            .values(task_count=total_tasks, completed_count=completed_tasks)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        processed += len(project_ids)
+        last_id = project_ids[-1]
@@ -1,21 +1,264 @@
+import hashlib
+import itertools
+import math
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from app.cache import CacheBackend, TTLCache
+from app.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# "sync" serves every route from the thread pool through psycopg2; "async" additionally
+# serves the hot read routes from the event loop through an asyncio driver.
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Comma-separated URLs of read replicas. Read-only routes are spread over them round-robin.
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 5))
+REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", 10))
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Returns `url` rewritten to use the asyncio driver of its database backend.
+    """
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    parsed = make_url(url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory SQLite lives inside a single connection; keep SQLAlchemy's default pool.
+            return options
+
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so their ON DELETE CASCADE, unless asked per connection.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_db_engine(url: str):
+    """
+    Creates a sync engine with the pool settings taken from the environment.
+    Every module must use the engines created here instead of calling `create_engine` itself.
+    """
+    engine = create_engine(url, **_engine_options(url, TimedQueuePool))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    return engine
+
+
+def create_async_db_engine(url: str):
+    engine = create_async_engine(url, **_engine_options(url, TimedAsyncAdaptedQueuePool))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return engine
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    async_engine = create_async_db_engine(os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+
+# Lag of a hot standby; 0 once it has replayed everything it received, so an idle primary
+# does not make its replicas look stale.
+POSTGRES_REPLICA_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.lag: Optional[float] = None
+        self.checked_at = -math.inf
+        self.error: Optional[str] = None
+
+    def measure_lag(self) -> float:
+        if self.engine.dialect.name != "postgresql":
+            # No replication to measure (e.g. SQLite stand-ins); always current.
+            return 0.0
+        with self.engine.connect() as connection:
+            return float(connection.execute(POSTGRES_REPLICA_LAG).scalar() or 0)
+
+    def refresh(self):
+        try:
+            self.lag = self.measure_lag()
+            self.error = None
+        except Exception as exc:
+            self.lag = None
+            self.error = str(exc)
+        self.checked_at = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECONDS
+
+    def status(self) -> dict:
+        return {"name": self.name, "lag_seconds": self.lag, "healthy": self.healthy, "error": self.error}
+
+
+class ReplicaRouter:
+    """
+    Picks the engine for read-only sessions: the next replica, round-robin, whose
+    lag was at most REPLICA_MAX_LAG_SECONDS when last measured, or the primary if
+    there is none. Lags are re-measured every REPLICA_LAG_CHECK_SECONDS by whichever
+    request finds them stale; concurrent requests keep using the previous values.
+    """
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._next = itertools.count()
+        self._refresh_lock = threading.Lock()
+
+    def _refresh_stale(self):
+        now = time.monotonic()
+        stale = [replica for replica in self.replicas if now - replica.checked_at >= REPLICA_LAG_CHECK_SECONDS]
+        if stale and self._refresh_lock.acquire(blocking=False):
+            try:
+                for replica in stale:
+                    replica.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def choose(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        self._refresh_stale()
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+
+replica_router = ReplicaRouter(
+    [Replica(f"replica-{index}", create_db_engine(url)) for index, url in enumerate(REPLICA_DATABASE_URLS)]
+)
+
+# Principals that committed a write recently; their reads stay on the primary.
+recent_writers: CacheBackend = TTLCache(maxsize=100000, ttl=REPLICA_READ_YOUR_WRITES_SECONDS)
+
+
+def set_recent_writers_backend(backend: CacheBackend) -> None:
+    """
+    Replaces the in-process record of recent writers, e.g. with a backend shared by
+    all workers so that a write on one worker pins the next reads on every worker.
+    """
+    global recent_writers
+    recent_writers = backend
+
+
+def _principal_key(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_session_wrote(session):
+    session.info["wrote"] = True
+
+
+def read_engine(request: Request):
+    """
+    Returns the engine a read-only request should use. Requests sending
+    `X-Read-Consistency: primary`, and requests of principals that committed a
+    write in the last REPLICA_READ_YOUR_WRITES_SECONDS, are served by the primary.
+    """
+    if request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary":
+        return engine
+    key = _principal_key(request)
+    if key is not None and recent_writers.get(key) is not None:
+        return engine
+    replica = replica_router.choose()
+    return replica.engine if replica is not None else engine
+
+
+def iter_pools():
+    """
+    Yields (name, pool) for every engine owned by this process.
+    """
+    yield "primary", engine.pool
+    if async_engine is not None:
+        yield "primary_async", async_engine.pool
+    for replica in replica_router.replicas:
+        yield replica.name, replica.engine.pool
+
+def get_db(request: Request):
     db = SessionLocal()
     try:
         yield db
     finally:
+        if db.info.get("wrote"):
+            key = _principal_key(request)
+            if key is not None:
+                recent_writers.set(key, True)
         db.close()
 
+def get_read_db(request: Request):
+    """
+    Session for read-only routes, bound to a replica when one is configured and current.
+    Must never be used to write.
+    """
+    db = SessionLocal(bind=read_engine(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,153 @@
+"""
+Per-project change feed.
+
+Write routes publish task and participant change events after committing, and
+`GET /projects/{id}/events` streams them to subscribers as Server-Sent Events.
+The default broker fans events out in-process: each subscriber is an asyncio
+queue on the worker's event loop, so an idle connection costs one suspended
+coroutine and no thread. Subscribers that fall EVENT_QUEUE_SIZE events behind
+have their backlog dropped and receive a single `resync` event instead, telling
+the client to reload; a slow client therefore never holds more than a bounded
+number of events in memory.
+
+Multi-worker deployments can install a shared broker with `set_event_broker`; it
+only needs to deliver every published event to `InMemoryEventBroker.fan_out` on
+each worker (e.g. from a Redis pub/sub listener).
+"""
+
+import asyncio
+import json
+import os
+import threading
+from typing import AsyncIterator, Dict, Set
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", 15))
+
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, project_id: int, maxsize: int):
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, event: dict):
+        """
+        Enqueues `event`; must run on the subscriber's event loop.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+
+class EventBroker:
+    def publish(self, project_id: int, event: dict) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, project_id: int) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryEventBroker(EventBroker):
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, project_id: int, event: dict) -> None:
+        self.fan_out(project_id, event)
+
+    def fan_out(self, project_id: int, event: dict) -> None:
+        """
+        Delivers `event` to this worker's subscribers of the project. Safe to call
+        from any thread; one callback is scheduled per event loop.
+        """
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._subscribers.get(project_id, ()))
+
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, loop_subscribers in by_loop.items():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver_all, loop_subscribers, event)
+
+    def subscribe(self, project_id: int) -> Subscription:
+        subscription = Subscription(project_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "projects": len(self._subscribers),
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "published": self.published,
+            }
+
+
+def _deliver_all(subscriptions, event: dict):
+    for subscription in subscriptions:
+        subscription.deliver(event)
+
+
+broker: EventBroker = InMemoryEventBroker()
+
+
+def set_event_broker(new_broker: EventBroker) -> None:
+    global broker
+    broker = new_broker
+
+
+def publish(project_id: int, event_type: str, **data) -> None:
+    """
+    Publishes a change event for the project. Call only after the change is committed.
+    """
+    broker.publish(project_id, {"type": event_type, "project_id": project_id, **data})
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def stream(subscription: Subscription) -> AsyncIterator[str]:
+    """
+    Yields the subscription's events as SSE frames, with a comment line every
+    EVENT_HEARTBEAT_SECONDS so idle connections stay open through proxies.
+    Unsubscribes when the client goes away.
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,182 @@
+"""
+Idempotency-Key support for the mutating endpoints that clients retry.
+
+A client sends the same `Idempotency-Key` header on every attempt of one
+operation. `IdempotencyMiddleware` stores the first response to
+`POST /projects/`, `POST /tasks/` or `POST /payment/subscribe` for
+IDEMPOTENCY_TTL seconds. A retry is answered from the store, marked with
+`Idempotent-Replayed: true`, without running the handler or touching the
+database. A retry that arrives while the first attempt is still running waits
+for it and gets the same response.
+
+Keys are scoped to the caller's Authorization header, method and path. Reusing a
+key with a different request body is rejected with 422. Only successes and the
+client errors a retry of the same request cannot fix (400 and 422) are stored:
+401, 402, 403, 404, 409, 429 and 5xx depend on state that may change (an expired
+token, a failed payment, a new subscription), so such attempts run again when retried.
+Responses larger than IDEMPOTENCY_MAX_RESPONSE_BYTES are not stored either.
+
+Stored responses live in a per-worker `TTLCache` of at most IDEMPOTENCY_CACHE_SIZE
+entries. Multi-worker deployments should install a shared `CacheBackend` with
+`set_idempotency_backend`; waiting for in-flight duplicates only works within one
+worker.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+from app.cache import CacheBackend, TTLCache
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_MAX_RESPONSE_BYTES = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", 65536))
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+# Client errors that the same request will always get again.
+STORED_CLIENT_ERRORS = {400, 422}
+
+IDEMPOTENT_ROUTES = {
+    ("POST", "/projects/"),
+    ("POST", "/tasks/"),
+    ("POST", "/payment/subscribe"),
+}
+
+response_store: CacheBackend = TTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL)
+
+
+def set_idempotency_backend(backend: CacheBackend) -> None:
+    """
+    Replaces the in-process response store, e.g. with a backend shared by all workers.
+    """
+    global response_store
+    response_store = backend
+
+
+def _storable(status_code: int) -> bool:
+    return 200 <= status_code < 300 or status_code in STORED_CLIENT_ERRORS
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+
+def _scoped_key(scope, idempotency_key: bytes) -> str:
+    principal = _header(scope, b"authorization") or b""
+    digest = hashlib.sha256(principal + b"\0" + idempotency_key).hexdigest()
+    return f"{scope['method']} {scope['path']} {digest}"
+
+
+async def _send_json(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, record: dict):
+    headers = list(record["headers"])
+    headers.append((IDEMPOTENT_REPLAYED_HEADER.lower().encode(), b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": record["body"]})
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware storing and replaying responses of requests carrying an `Idempotency-Key`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = _header(scope, IDEMPOTENCY_KEY_HEADER.lower().encode())
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {IDEMPOTENCY_MAX_KEY_LENGTH} characters long.")
+            return
+
+        # The body is needed for the fingerprint, so it is read up front and handed on unchanged.
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        key = _scoped_key(scope, idempotency_key)
+        while True:
+            record = response_store.get(key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    await _send_json(send, 422, f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request.")
+                else:
+                    await _replay(send, record)
+                return
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            # A failed or unstorable first attempt leaves nothing to replay; then try again ourselves.
+            await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            await self._run_and_store(scope, replay_receive, send, key, fingerprint)
+        finally:
+            del self._in_flight[key]
+            future.set_result(None)
+
+    async def _run_and_store(self, scope, receive, send, key: str, fingerprint: str):
+        start = None
+        chunks = []
+        size = 0
+
+        async def capture_send(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body" and size <= IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, receive, capture_send)
+
+        if start is None or not _storable(start["status"]) or size > IDEMPOTENCY_MAX_RESPONSE_BYTES:
+            return
+        response_store.set(key, {
+            "fingerprint": fingerprint,
+            "status": start["status"],
+            "headers": list(start.get("headers", [])),
+            "body": b"".join(chunks),
+        })
@@ -1,10 +1,28 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
-from app.routers import users, projects, tasks, auth, subscription, superuser
-app = FastAPI()
+from app.database import DB_MODE
+from app.idempotency import IDEMPOTENT_REPLAYED_HEADER, IdempotencyMiddleware
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.metrics import MetricsMiddleware
+from app.metrics import router as metrics_router
+from app.querycount import QUERY_COUNT_HEADER, QueryCountMiddleware
+from app.routers import users, projects, tasks, auth, subscription, superuser, async_reads, internal
+from app import purge, subscriptions
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = subscriptions.start_sweeper()
+    purger = purge.start_purger()
+    yield
+    await purge.stop_purger(purger)
+    await subscriptions.stop_sweeper(sweeper)
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 
@@ -13,13 +31,23 @@ origins = [
     "http://127.0.0.1:5173",  
 ]
 
+# Innermost, so that replayed responses still pass through CORS and the metrics.
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,  
     allow_credentials=True, 
     allow_methods=["*"],  
     allow_headers=["*"],  
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, QUERY_COUNT_HEADER, IDEMPOTENT_REPLAYED_HEADER],
 )
+# QueryCountMiddleware is added last so that it wraps MetricsMiddleware, which reads its counter.
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryCountMiddleware)
+
+if DB_MODE == "async":
+    app.include_router(async_reads.projects_router, prefix="/projects", tags=["Projects"])
+    app.include_router(async_reads.tasks_router, prefix="/tasks", tags=["Tasks"])
 
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(projects.router, prefix="/projects", tags=["Projects"])
@@ -27,9 +55,8 @@ app.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
 app.include_router(auth.router)
 app.include_router(subscription.router, tags=["Subs"])
 app.include_router(superuser.router, tags=["Super-User"])
-
-
-Base.metadata.create_all(bind=engine)
+app.include_router(internal.router)
+app.include_router(metrics_router)
 
 
 if __name__ == "__main__":
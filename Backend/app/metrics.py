@@ -0,0 +1,181 @@
+"""
+Prometheus instrumentation.
+
+`MetricsMiddleware` records, per route template, the request latency, the
+number of requests in flight, and the number and duration of the SQL
+statements each request executed (taken from the request's
+`app.querycount.QueryCounter`). Connection pool checkout waits are observed
+through the pools' stats. Everything is served as Prometheus text on
+`GET /metrics`.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers before they start. Each worker then writes its
+samples there and any worker's `/metrics` answers with the aggregate. Remove the
+directory's contents between deployments, and call `mark_worker_dead(pid)` from
+the process manager's child-exit hook (e.g. gunicorn's `child_exit`).
+"""
+
+import os
+import time
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from app import database
+from app.querycount import current_request_counter
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving HTTP requests.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements",
+    "SQL statements executed per HTTP request.",
+    ["method", "route"],
+    buckets=STATEMENT_BUCKETS,
+)
+SQL_SECONDS = Histogram(
+    "http_request_sql_seconds",
+    "Time spent executing SQL statements per HTTP request.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    ["pool"],
+    buckets=WAIT_BUCKETS,
+)
+
+SUBSCRIPTIONS_EXPIRED = Counter(
+    "subscriptions_expired_total",
+    "Subscriptions switched off by the expiry sweeper.",
+)
+SUBSCRIPTION_SWEEP_FAILURES = Counter(
+    "subscription_sweep_failures_total",
+    "Subscription expiry sweeps that raised an error.",
+)
+SUBSCRIPTION_SWEEP_DURATION = Histogram(
+    "subscription_sweep_duration_seconds",
+    "Time taken by a subscription expiry sweep.",
+    buckets=LATENCY_BUCKETS,
+)
+SUBSCRIPTION_SWEEP_LAST_SUCCESS = Gauge(
+    "subscription_sweep_last_success_timestamp_seconds",
+    "Unix time of the last successful subscription expiry sweep.",
+    multiprocess_mode="max",
+)
+PROJECTS_PURGED = Counter(
+    "projects_purged_total",
+    "Soft-deleted projects removed by the background purge.",
+)
+PROJECT_TASKS_PURGED = Counter(
+    "project_tasks_purged_total",
+    "Tasks of soft-deleted projects removed by the background purge.",
+)
+PROJECT_PURGE_FAILURES = Counter(
+    "project_purge_failures_total",
+    "Project purges that raised an error.",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by a rate limit policy.",
+    ["policy"],
+)
+
+# Requests that matched no route share one label so that scanners cannot create new series.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _observe_pool(name: str):
+    histogram = POOL_WAIT.labels(name)
+    return histogram.observe
+
+
+for _name, _pool in database.iter_pools():
+    if getattr(_pool, "stats", None) is not None:
+        _pool.stats.observer = _observe_pool(_name)
+
+
+def mark_worker_dead(pid: int):
+    """
+    Drops the live gauges of an exited worker in multiprocess mode.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the request metrics. Must run inside `QueryCountMiddleware`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(elapsed)
+            counter = current_request_counter()
+            if counter is not None:
+                SQL_STATEMENTS.labels(method, route).observe(counter.count)
+                SQL_SECONDS.labels(method, route).observe(counter.seconds)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Returns every metric of this worker, or of all workers in multiprocess mode, in Prometheus text format.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,142 @@
+"""
+Versioned schema migrations.
+
+Revisions live in `app.migrations.versions` as modules named `<revision>_<slug>.py`
+and are applied in revision order by `python -m app.cli migrate`. Each module defines:
+
+    description = "What the revision does"
+    transactional = True          # False to run in autocommit mode (CREATE INDEX CONCURRENTLY)
+
+    def upgrade(connection): ...
+
+Applied revisions are recorded in the `schema_migrations` table. Revisions must be
+idempotent (IF NOT EXISTS, column checks) so that databases created by the old
+`create_all` at startup can be brought under migration control, and so that a
+non-transactional revision interrupted half-way can simply be run again. On
+PostgreSQL an advisory lock keeps concurrent `migrate` runs (e.g. one per
+container) from applying the same revision twice.
+
+The application itself never runs DDL; run `migrate` before starting new code.
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATION_LOCK_ID = 72_101_018
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("revision", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Revision:
+    def __init__(self, module):
+        self.revision = module.__name__.rsplit(".", 1)[-1].split("_", 1)[0]
+        self.description = module.description
+        self.transactional = getattr(module, "transactional", True)
+        self.upgrade = module.upgrade
+
+
+def load_revisions() -> List[Revision]:
+    from app.migrations import versions
+
+    modules = sorted(info.name for info in pkgutil.iter_modules(versions.__path__))
+    return [Revision(importlib.import_module(f"{versions.__name__}.{name}")) for name in modules]
+
+
+def applied_revisions(connection: Connection) -> set:
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.scalars(select(schema_migrations.c.revision)))
+
+
+def status(engine: Engine) -> List[tuple]:
+    """
+    Returns (revision, description, applied) for every known revision.
+    """
+    with engine.begin() as connection:
+        applied = applied_revisions(connection)
+    return [(revision.revision, revision.description, revision.revision in applied) for revision in load_revisions()]
+
+
+def _record(connection: Connection, revision: Revision):
+    connection.execute(
+        schema_migrations.insert().values(
+            revision=revision.revision, description=revision.description, applied_at=datetime.utcnow()
+        )
+    )
+
+
+def migrate(engine: Engine, target: Optional[str] = None, log=print) -> List[str]:
+    """
+    Applies every pending revision up to and including `target` (all of them by default).
+
+    Returns the revisions applied.
+    """
+    applied_now = []
+    with engine.connect() as lock_connection:
+        if engine.dialect.name == "postgresql":
+            lock_connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+            lock_connection.commit()
+        try:
+            with engine.begin() as connection:
+                applied = applied_revisions(connection)
+
+            for revision in load_revisions():
+                if target is not None and revision.revision > target:
+                    break
+                if revision.revision in applied:
+                    continue
+                log(f"Applying {revision.revision}: {revision.description}")
+                if revision.transactional:
+                    with engine.begin() as connection:
+                        revision.upgrade(connection)
+                        _record(connection, revision)
+                else:
+                    with engine.connect() as connection:
+                        revision.upgrade(connection.execution_options(isolation_level="AUTOCOMMIT"))
+                    with engine.begin() as connection:
+                        _record(connection, revision)
+                applied_now.append(revision.revision)
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_connection.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+                lock_connection.commit()
+    return applied_now
+
+
+def drop_schema_migrations(connection: Connection):
+    """
+    Forgets every applied revision; used together with `drop_all` by scratch databases.
+    """
+    schema_migrations.drop(connection, checkfirst=True)
+
+
+def create_index(connection: Connection, name: str, table: str, expression: str, using: Optional[str] = None):
+    """
+    Creates an index if it does not exist yet, CONCURRENTLY on PostgreSQL so that
+    writes to `table` are not blocked while it is built. The connection must be in
+    autocommit mode on PostgreSQL.
+
+    An invalid index left behind by an interrupted concurrent build is dropped and rebuilt.
+    """
+    method = f" USING {using}" if using else ""
+    if connection.dialect.name == "postgresql":
+        invalid = connection.exec_driver_sql(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = %(name)s AND NOT i.indisvalid",
+            {"name": name},
+        ).first()
+        if invalid:
+            connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        connection.exec_driver_sql(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({expression})")
+    else:
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({expression})")
@@ -0,0 +1,55 @@
+"""
+The schema as originally created by `create_all`: users, projects, tasks and project_users.
+
+The tables are declared here rather than taken from `app.models`, so this revision keeps
+creating the same schema as the models evolve.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text
+
+description = "Create users, projects, tasks and project_users"
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String, nullable=False, unique=True, index=True),
+    Column("email", String, nullable=False, unique=True, index=True),
+    Column("hashed_password", String, nullable=False),
+    Column("is_active", Boolean),
+    Column("role", String, nullable=False),
+    Column("is_subscribed", Boolean),
+    Column("subscription_end_date", DateTime, nullable=True),
+)
+
+Table(
+    "projects",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False, index=True),
+    Column("description", Text, nullable=True),
+    Column("owner_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+)
+
+Table(
+    "tasks",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False, index=True),
+    Column("description", Text, nullable=True),
+    Column("is_completed", Boolean),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+)
+
+Table(
+    "project_users",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
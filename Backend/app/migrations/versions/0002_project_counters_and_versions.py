@@ -0,0 +1,47 @@
+"""
+Columns added for the denormalized task counters, ETag versions and change timestamps.
+
+Databases created by `create_all` after these columns were introduced already have
+them; older ones get them here, with the counters backfilled from the tasks table.
+"""
+
+from sqlalchemy import Boolean, column, func, inspect, select, table, update
+
+description = "Add project task counters, version and updated_at columns"
+
+projects = table("projects", column("id"), column("task_count"), column("completed_count"))
+tasks = table("tasks", column("project_id"), column("is_completed", Boolean))
+
+
+def _timestamp_default(connection) -> str:
+    # SQLite cannot add a column with a non-constant default; rows are stamped below.
+    return "CURRENT_TIMESTAMP" if connection.dialect.name == "postgresql" else "'1970-01-01 00:00:00'"
+
+
+def _add_column(connection, existing, table_name, name, definition) -> bool:
+    if name in existing[table_name]:
+        return False
+    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {name} {definition}")
+    return True
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    existing = {name: {c["name"] for c in inspector.get_columns(name)} for name in ("projects", "tasks")}
+    timestamp = f"TIMESTAMP NOT NULL DEFAULT {_timestamp_default(connection)}"
+
+    counters_added = _add_column(connection, existing, "projects", "task_count", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, existing, "projects", "completed_count", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, existing, "projects", "version", "INTEGER NOT NULL DEFAULT 1")
+    for table_name in ("projects", "tasks"):
+        if _add_column(connection, existing, table_name, "updated_at", timestamp):
+            connection.exec_driver_sql(f"UPDATE {table_name} SET updated_at = CURRENT_TIMESTAMP")
+
+    if counters_added:
+        total = select(func.count()).where(tasks.c.project_id == projects.c.id).scalar_subquery()
+        completed = (
+            select(func.count())
+            .where(tasks.c.project_id == projects.c.id, tasks.c.is_completed.is_(True))
+            .scalar_subquery()
+        )
+        connection.execute(update(projects).values(task_count=total, completed_count=completed))
@@ -0,0 +1,30 @@
+"""
+Indexes behind the hot queries, built without blocking writes on PostgreSQL.
+
+- projects.owner_id and project_users.project_id: the "projects visible to a user"
+  filter and participant lookups (the project_users primary key leads with user_id).
+- tasks(project_id, is_completed): task lists and progress counts per project.
+- users.subscription_end_date: the subscription expiry sweep.
+- username/email search indexes: trigram GIN on PostgreSQL, lower() prefix indexes
+  elsewhere (see app/search.py).
+"""
+
+from app.migrations import create_index
+
+description = "Add performance indexes"
+transactional = False
+
+
+def upgrade(connection):
+    create_index(connection, "ix_projects_owner_id", "projects", "owner_id")
+    create_index(connection, "ix_project_users_project_id", "project_users", "project_id")
+    create_index(connection, "ix_tasks_project_id_is_completed", "tasks", "project_id, is_completed")
+    create_index(connection, "ix_users_subscription_end_date", "users", "subscription_end_date")
+
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        create_index(connection, "ix_users_username_trgm", "users", "username gin_trgm_ops", using="gin")
+        create_index(connection, "ix_users_email_trgm", "users", "email gin_trgm_ops", using="gin")
+    else:
+        create_index(connection, "ix_users_username_lower", "users", "lower(username)")
+        create_index(connection, "ix_users_email_lower", "users", "lower(email)")
@@ -0,0 +1,17 @@
+"""
+Soft deletion of projects: `projects.deleted_at`, set on projects too large to
+delete within a request and cleared by the background purge (see app/purge.py).
+The index lets the purge find them without scanning the projects table.
+"""
+
+from sqlalchemy import inspect
+from app.migrations import create_index
+
+description = "Add projects.deleted_at for soft deletion"
+transactional = False
+
+
+def upgrade(connection):
+    if "deleted_at" not in {c["name"] for c in inspect(connection).get_columns("projects")}:
+        connection.exec_driver_sql("ALTER TABLE projects ADD COLUMN deleted_at TIMESTAMP")
+    create_index(connection, "ix_projects_deleted_at", "projects", "deleted_at")
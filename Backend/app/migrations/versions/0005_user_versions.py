@@ -0,0 +1,13 @@
+"""
+`users.version`, bumped by every update of a user row, so that the ETags and cache
+keys of responses listing a project's participants change when a participant does.
+"""
+
+from sqlalchemy import inspect
+
+description = "Add users.version"
+
+
+def upgrade(connection):
+    if "version" not in {c["name"] for c in inspect(connection).get_columns("users")}:
+        connection.exec_driver_sql("ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
@@ -0,0 +1,20 @@
+"""
+Replaces the GIN trigram indexes of the user search with GiST ones: GiST can
+return rows ordered by trigram distance, so a search reads only the `limit`
+nearest users instead of ranking every match (see app/search.py). The new indexes
+are built before the old ones are dropped, both without blocking writes.
+"""
+
+from app.migrations import create_index
+
+description = "Replace the user search GIN trigram indexes with GiST"
+transactional = False
+
+
+def upgrade(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    create_index(connection, "ix_users_username_trgm_gist", "users", "username gist_trgm_ops", using="gist")
+    create_index(connection, "ix_users_email_trgm_gist", "users", "email gist_trgm_ops", using="gist")
+    connection.exec_driver_sql("DROP INDEX CONCURRENTLY IF EXISTS ix_users_username_trgm")
+    connection.exec_driver_sql("DROP INDEX CONCURRENTLY IF EXISTS ix_users_email_trgm")
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Table, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Table, DateTime, Index, DDL, event, func, literal_column
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.database import Base
 
 
@@ -7,7 +8,9 @@ project_users = Table(
     "project_users",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
-    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key leads with user_id; participant lookups by project need their own index.
+    Index("ix_project_users_project_id", "project_id"),
 )
 
 class User(Base):
@@ -20,29 +23,58 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     role = Column(String, nullable=False, default="user")
     is_subscribed = Column(Boolean, default=False)
-    subscription_end_date = Column(DateTime, nullable=True) 
+    subscription_end_date = Column(DateTime, nullable=True, index=True)
+    # Bumped by every UPDATE of the row, ORM or bulk; folded into the ETags of responses listing participants.
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
 
 
-    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
+    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
 
 
     joined_projects = relationship(
-        "Project", secondary="project_users", back_populates="participants"
+        "Project", secondary="project_users", back_populates="participants", passive_deletes=True
     )
 
-    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
+    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, email={self.email}, role={self.role})>"
 
 
+# Indexes used by the invite-box user search (see app/search.py): trigram GiST indexes,
+# which can return rows nearest first, on PostgreSQL; lower() prefix indexes everywhere else.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+Index(
+    "ix_users_username_trgm_gist", User.username,
+    postgresql_using="gist", postgresql_ops={"username": "gist_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_email_trgm_gist", User.email,
+    postgresql_using="gist", postgresql_ops={"email": "gist_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index("ix_users_username_lower", func.lower(User.username)).ddl_if(dialect="sqlite")
+Index("ix_users_email_lower", func.lower(User.email)).ddl_if(dialect="sqlite")
+
+
 class Project(Base):
     __tablename__ = "projects"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Maintained by app.counters on every task write.
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped on every change to the project, its tasks or its participants; used for ETags.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set on projects too large to delete within a request; app.purge removes them in batches.
+    deleted_at = Column(DateTime, nullable=True, index=True)
 
     owner = relationship("User", back_populates="projects")
 
@@ -50,10 +82,12 @@ class Project(Base):
     owner = relationship("User", back_populates="projects")
 
   
+    # Rows of project_users and tasks are removed by the ON DELETE CASCADE foreign keys;
+    # passive_deletes keeps the ORM from loading them just to delete them one by one.
     participants = relationship(
-        "User", secondary="project_users", back_populates="joined_projects"
+        "User", secondary="project_users", back_populates="joined_projects", passive_deletes=True
           )
-    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Project(id={self.id}, title={self.title}, owner_id={self.owner_id})>"
@@ -61,12 +95,16 @@ class Project(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_project_id_is_completed", "project_id", "is_completed"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     is_completed = Column(Boolean, default=False)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     project = relationship("Project", back_populates="tasks")
 
@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are ordered by primary key and continue from the last id of the previous
+page, so deep pages cost the same as the first one. The opaque cursor for the
+next page is returned in the `X-Next-Cursor` header and, when requested, the
+total number of matching rows in `X-Total-Count`. Response bodies stay plain lists.
+"""
+
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None),
+        include_total: bool = Query(False),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.include_total = include_total
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(cursor)
+        return last_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+
+def _page_statement(statement, id_column, page: PageParams):
+    if page.cursor:
+        statement = statement.where(id_column > decode_cursor(page.cursor))
+    return statement.order_by(id_column).limit(page.limit + 1)
+
+
+def _count_statement(statement):
+    return select(func.count()).select_from(statement.order_by(None).subquery())
+
+
+def _finish_page(rows: list, id_column, page: PageParams, response: Response) -> list:
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], id_column.key))
+    return rows
+
+
+def paginate(db: Session, statement, id_column, page: PageParams, response: Response) -> list:
+    """
+    Applies keyset pagination on `id_column` to the `statement` select and returns one page of rows.
+
+    Sets the next-page cursor header when more rows are available and, if
+    `page.include_total` is set, the total count of rows matching the filters.
+    """
+    if page.include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(db.scalar(_count_statement(statement)))
+
+    rows = db.scalars(_page_statement(statement, id_column, page)).all()
+    return _finish_page(list(rows), id_column, page, response)
+
+
+async def paginate_async(db: AsyncSession, statement, id_column, page: PageParams, response: Response) -> list:
+    """
+    Async counterpart of `paginate`.
+    """
+    if page.include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await db.scalar(_count_statement(statement)))
+
+    rows = (await db.scalars(_page_statement(statement, id_column, page))).all()
+    return _finish_page(list(rows), id_column, page, response)
@@ -0,0 +1,363 @@
+"""
+Response cache for the hot project reads: `GET /projects/{id}`,
+`GET /projects/{id}/users` and `GET /tasks/?project_id=`.
+
+Entries are keyed by project, by a per-project generation and by the caller's
+access class (owner, participant or subscriber); the task list also keys on its
+query string. The caller's access to the project (owner and participant check
+plus the ETag version) is cached under the same generation, so a warm task list
+runs no SQL at all. The project and participant views embed the participants' user
+rows, whose changes (subscription, role, email) do not touch the project; they
+also key on the sum of the participants' `users.version`, read with one aggregate
+query per request.
+
+Every write to a project, its tasks or its participants replaces the project's
+generation once the transaction commits: `counters.touch_project` (used by all
+task and membership writes) queues the invalidation, and so does any ORM
+update or delete of a `Project`. Old entries are never read again and age out of
+the LRU. Writes that bypass both (bulk imports, manual SQL) are only picked up
+after PROJECT_CACHE_TTL seconds.
+
+Concurrent misses on the same key are coalesced: one request loads the response
+while the others wait for it and then read it from the cache. With read replicas,
+responses read from a replica within REPLICA_MAX_LAG_SECONDS of an invalidation
+are served but not stored, so a lagging replica cannot repopulate the cache with
+the state from before the write.
+
+With DB_MODE=async, `cached_project_viewer_async` and `cached_json_async` serve
+the async task list from the same entries; the async engine always reads the
+primary, so its responses are always stored.
+
+Entries live in a per-worker `TTLCache`; `set_project_cache_backend` installs a
+backend shared by all workers, which then also share invalidations.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable
+from fastapi import Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import database, dependencies, models, queries
+from app.cache import CacheBackend, TTLCache
+from app.utils import get_current_user, get_current_user_async
+
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", 10000))
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", 60))
+
+project_cache: CacheBackend = TTLCache(maxsize=PROJECT_CACHE_SIZE, ttl=PROJECT_CACHE_TTL)
+coalesced_misses = 0
+
+_fill_locks: Dict[str, list] = {}
+_fill_locks_guard = threading.Lock()
+_async_fill_locks: Dict[str, list] = {}
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def set_project_cache_backend(backend: CacheBackend) -> None:
+    """
+    Replaces the in-process project response cache, e.g. with a backend shared by all workers.
+    """
+    global project_cache
+    project_cache = backend
+
+
+def stats() -> dict:
+    return {**project_cache.stats(), "coalesced_misses": coalesced_misses}
+
+
+def _generation_key(project_id: int) -> str:
+    return f"project:{project_id}:generation"
+
+
+def _new_generation() -> dict:
+    return {"token": uuid.uuid4().hex, "at": time.time()}
+
+
+def invalidate_project(project_id: int) -> None:
+    """
+    Makes every cached response of the project unreachable, immediately.
+    """
+    project_cache.set(_generation_key(project_id), _new_generation(), ttl=PROJECT_CACHE_TTL * 2)
+
+
+def queue_project_invalidation(db: Session, project_id: int) -> None:
+    """
+    Invalidates the project once the session's current transaction commits.
+    """
+    db.info.setdefault("stale_projects", set()).add(project_id)
+
+
+@event.listens_for(models.Project, "after_update")
+@event.listens_for(models.Project, "after_delete")
+def _queue_invalidation_on_flush(mapper, connection, target):
+    session = inspect(target).session
+    if session is not None:
+        queue_project_invalidation(session, target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_projects(session):
+    for project_id in session.info.pop("stale_projects", ()):
+        invalidate_project(project_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_queued_projects(session, previous_transaction):
+    session.info.pop("stale_projects", None)
+
+
+def _generation(project_id: int) -> dict:
+    generation = project_cache.get(_generation_key(project_id))
+    if generation is None:
+        # Never seen, or evicted: anything cached under an older generation is unreachable.
+        generation = _new_generation()
+        project_cache.set(_generation_key(project_id), generation, ttl=PROJECT_CACHE_TTL * 2)
+    return generation
+
+
+def _may_store(db: Session, generation: dict) -> bool:
+    if db.get_bind() is database.engine:
+        return True
+    return time.time() - generation["at"] > database.REPLICA_MAX_LAG_SECONDS
+
+
+class _FillLock:
+    def __init__(self, key: str):
+        self.key = key
+
+    def __enter__(self):
+        with _fill_locks_guard:
+            entry = _fill_locks.setdefault(self.key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+
+    def __exit__(self, *exc_info):
+        with _fill_locks_guard:
+            entry = _fill_locks[self.key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del _fill_locks[self.key]
+
+
+def _get_or_load(key: str, load: Callable[[], Any], store: bool) -> Any:
+    global coalesced_misses
+    value = project_cache.get(key)
+    if value is not None:
+        return value
+    with _FillLock(key):
+        # Whoever held the lock before us may have just stored it.
+        value = project_cache.get(key)
+        if value is not None:
+            coalesced_misses += 1
+            return value
+        value = load()
+        if store:
+            project_cache.set(key, value)
+        return value
+
+
+async def _get_or_load_async(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    global coalesced_misses
+    value = project_cache.get(key)
+    if value is not None:
+        return value
+    # Only the event loop touches these, so they need no guard.
+    entry = _async_fill_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            value = project_cache.get(key)
+            if value is not None:
+                coalesced_misses += 1
+                return value
+            value = await load()
+            project_cache.set(key, value)
+            return value
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _async_fill_locks[key]
+
+
+class CachedProject:
+    """
+    Cached view of a project for one caller: what the access check and the ETags need.
+    """
+
+    def __init__(self, project_id: int, generation: dict, access: dict, access_class: str, instance=None):
+        self.id = project_id
+        self.owner_id = access["owner_id"]
+        self.version = access["version"]
+        self.updated_at = access["updated_at"]
+        self.generation = generation
+        self.access_class = access_class
+        # Kept so that the session's identity map, which holds weak references, still has it.
+        self._instance = instance
+
+    def load(self, db: Session) -> models.Project:
+        """
+        Returns the ORM project, reusing the one read by the access check if there was one.
+        """
+        if self._instance is None:
+            self._instance = db.get(models.Project, self.id)
+        return self._instance
+
+    def key(self, *parts) -> str:
+        return ":".join(["project", str(self.id), self.generation["token"], self.access_class, *map(str, parts)])
+
+
+class CachedProjectAccess:
+    """
+    Unit to authorize the current user on the project named by `project_id` like
+    `dependencies.ProjectAccess`, from the cache when possible, returning a `CachedProject`.
+    """
+
+    def __init__(self, level: str = dependencies.PROJECT_VIEWER):
+        self.level = level
+
+    def __call__(
+        self,
+        project_id: int,
+        db: Session = Depends(database.get_read_db),
+        current_user: models.User = Depends(get_current_user),
+    ) -> CachedProject:
+        generation = _generation(project_id)
+        key = _access_key(project_id, generation, current_user)
+        instance = None
+
+        access = project_cache.get(key)
+        if access is None:
+            row = db.execute(queries.project_access_statement(project_id, current_user.id)).first()
+            instance, access = _access_entry(row, current_user, self.level)
+            if _may_store(db, generation):
+                project_cache.set(key, access)
+
+        return _authorize(project_id, generation, access, current_user, self.level, instance)
+
+
+class CachedProjectAccessAsync(CachedProjectAccess):
+    """
+    Async counterpart of `CachedProjectAccess`, for the routes served from the event loop.
+    """
+
+    async def __call__(
+        self,
+        project_id: int,
+        db: AsyncSession = Depends(database.get_async_db),
+        current_user: models.User = Depends(get_current_user_async),
+    ) -> CachedProject:
+        generation = _generation(project_id)
+        key = _access_key(project_id, generation, current_user)
+
+        access = project_cache.get(key)
+        if access is None:
+            row = (await db.execute(queries.project_access_statement(project_id, current_user.id))).first()
+            _, access = _access_entry(row, current_user, self.level)
+            project_cache.set(key, access)
+
+        return _authorize(project_id, generation, access, current_user, self.level)
+
+
+def _access_key(project_id: int, generation: dict, user: models.User) -> str:
+    return f"project:{project_id}:{generation['token']}:access:{user.id}"
+
+
+def _access_entry(row, user: models.User, level: str):
+    if row is None:
+        dependencies.check_project_access(None, user, level)
+    instance, is_participant = row
+    return instance, {
+        "owner_id": instance.owner_id,
+        "is_participant": bool(is_participant),
+        "version": instance.version,
+        "updated_at": instance.updated_at,
+    }
+
+
+def _authorize(project_id: int, generation: dict, access: dict, user: models.User, level: str, instance=None) -> CachedProject:
+    if access["owner_id"] == user.id:
+        access_class = "owner"
+    elif access["is_participant"]:
+        access_class = "participant"
+    else:
+        access_class = "subscriber"
+    project = CachedProject(project_id, generation, access, access_class, instance)
+    dependencies.check_project_access((project, access["is_participant"]), user, level)
+    return project
+
+
+cached_project_viewer = CachedProjectAccess(dependencies.PROJECT_VIEWER)
+cached_project_viewer_async = CachedProjectAccessAsync(dependencies.PROJECT_VIEWER)
+
+
+def _adapter(model) -> TypeAdapter:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter
+
+
+def cached_json(
+    db: Session,
+    project: CachedProject,
+    view: str,
+    response: Response,
+    model,
+    load: Callable[[], Any],
+    variant: str = "",
+    headers: Iterable[str] = (),
+) -> Response:
+    """
+    Returns the JSON response `view` of the project, serialized with `model`, from
+    the cache or by calling `load`. `headers` set on `response` by `load` (e.g.
+    pagination headers) are cached along with the body; the headers already on
+    `response` (e.g. the ETag) are sent as well.
+    """
+
+    def render() -> dict:
+        return _render(model, load(), response, headers)
+
+    entry = _get_or_load(project.key(view, variant), render, _may_store(db, project.generation))
+    return _respond(entry, response)
+
+
+async def cached_json_async(
+    project: CachedProject,
+    view: str,
+    response: Response,
+    model,
+    load: Callable[[], Awaitable[Any]],
+    variant: str = "",
+    headers: Iterable[str] = (),
+) -> Response:
+    """
+    Async counterpart of `cached_json`, sharing its entries; `load` is a coroutine function.
+    """
+
+    async def render() -> dict:
+        return _render(model, await load(), response, headers)
+
+    entry = await _get_or_load_async(project.key(view, variant), render)
+    return _respond(entry, response)
+
+
+def _render(model, value, response: Response, headers: Iterable[str]) -> dict:
+    adapter = _adapter(model)
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return {"body": body, "headers": {name: response.headers[name] for name in headers if name in response.headers}}
+
+
+def _respond(entry: dict, response: Response) -> Response:
+    cached = Response(content=entry["body"], media_type="application/json")
+    for name, value in response.headers.items():
+        if name != "content-length":
+            cached.headers[name] = value
+    cached.headers.update(entry["headers"])
+    return cached
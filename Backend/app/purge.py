@@ -0,0 +1,124 @@
+"""
+Background removal of soft-deleted projects.
+
+Deleting a project relies on the ON DELETE CASCADE foreign keys of `tasks` and
+`project_users`, but a single DELETE of a project with a million tasks still
+holds its locks for as long as the cascade takes. Projects with more than
+PROJECT_SOFT_DELETE_THRESHOLD tasks are therefore only marked with `deleted_at`
+by `DELETE /projects/{id}`, which hides them from every read at once. The purge
+then deletes their tasks PROJECT_PURGE_BATCH_SIZE at a time, one transaction per
+batch, and finally the project row itself.
+
+It runs every PROJECT_PURGE_INTERVAL_SECONDS inside each API worker (0 disables
+it) and can also run as a standalone worker with `python -m app.cli purge-projects --loop`.
+On PostgreSQL a transaction-level advisory lock lets only one process purge at a time.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app import database, metrics, models
+
+PROJECT_SOFT_DELETE_THRESHOLD = int(os.getenv("PROJECT_SOFT_DELETE_THRESHOLD", 1000))
+PROJECT_PURGE_INTERVAL_SECONDS = float(os.getenv("PROJECT_PURGE_INTERVAL_SECONDS", 60))
+PROJECT_PURGE_BATCH_SIZE = int(os.getenv("PROJECT_PURGE_BATCH_SIZE", 5000))
+
+PURGE_LOCK_ID = 72_101_025
+
+logger = logging.getLogger(__name__)
+
+
+def _acquire_purge_lock(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return db.scalar(select(func.pg_try_advisory_xact_lock(PURGE_LOCK_ID)))
+
+
+def purge_deleted_projects(db: Session, batch_size: int = PROJECT_PURGE_BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Removes every soft-deleted project, oldest first, committing after each batch
+    of at most `batch_size` tasks.
+
+    Returns the number of projects and tasks removed.
+    """
+    projects_purged = tasks_purged = 0
+    while True:
+        if not _acquire_purge_lock(db):
+            db.rollback()
+            return projects_purged, tasks_purged
+
+        project_id = db.scalar(
+            select(models.Project.id)
+            .where(models.Project.deleted_at.is_not(None))
+            .order_by(models.Project.deleted_at, models.Project.id)
+            .limit(1)
+        )
+        if project_id is None:
+            db.rollback()
+            return projects_purged, tasks_purged
+
+        batch = select(models.Task.id).where(models.Task.project_id == project_id).limit(batch_size)
+        deleted = db.execute(
+            delete(models.Task).where(models.Task.id.in_(batch.scalar_subquery())),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if deleted < batch_size:
+            # The foreign keys take the memberships with it.
+            db.execute(
+                delete(models.Project).where(models.Project.id == project_id),
+                execution_options={"synchronize_session": False},
+            )
+            projects_purged += 1
+        db.commit()
+        tasks_purged += deleted
+
+
+def purge() -> Tuple[int, int]:
+    """
+    Runs one purge with its own session and records it in the purge metrics.
+    """
+    db = database.SessionLocal()
+    try:
+        projects_purged, tasks_purged = purge_deleted_projects(db)
+    except Exception:
+        metrics.PROJECT_PURGE_FAILURES.inc()
+        raise
+    finally:
+        db.close()
+    metrics.PROJECTS_PURGED.inc(projects_purged)
+    metrics.PROJECT_TASKS_PURGED.inc(tasks_purged)
+    if projects_purged or tasks_purged:
+        logger.info("Purged %d deleted projects and %d of their tasks", projects_purged, tasks_purged)
+    return projects_purged, tasks_purged
+
+
+async def run_purger(interval: float = PROJECT_PURGE_INTERVAL_SECONDS):
+    """
+    Purges every `interval` seconds until cancelled; failures are logged and retried next time.
+    """
+    while True:
+        try:
+            await run_in_threadpool(purge)
+        except Exception:
+            logger.exception("Project purge failed")
+        await asyncio.sleep(interval)
+
+
+def start_purger() -> Optional[asyncio.Task]:
+    if PROJECT_PURGE_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(run_purger())
+
+
+async def stop_purger(task: Optional[asyncio.Task]):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
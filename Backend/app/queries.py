@@ -0,0 +1,155 @@
+"""
+SQL statements shared by the sync routers and the async read routes.
+
+Each builder returns a `select()` that can be executed on either a `Session`
+or an `AsyncSession`, so both modes answer with exactly the same queries.
+"""
+
+from typing import List, Optional
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from app import models
+
+
+def accessible_projects_filter(user_id: int):
+    """
+    Filter matching the projects owned by or shared with the given user, except deleted ones.
+    """
+    return models.Project.deleted_at.is_(None) & (
+        (models.Project.owner_id == user_id) | (models.Project.participants.any(id=user_id))
+    )
+
+
+def project_detail_options():
+    """
+    Loader options for routes answering with the nested `schemas.Project`: tasks and
+    participants are fetched with one extra statement each, whatever the number of projects.
+    """
+    return (
+        selectinload(models.Project.tasks),
+        selectinload(models.Project.participants),
+    )
+
+
+def user_projects_statement(user_id: int):
+    return (
+        select(models.Project)
+        .where(accessible_projects_filter(user_id))
+        .options(*project_detail_options())
+    )
+
+
+def user_project_summaries_statement(user_id: int):
+    """
+    Projects visible to the user with only the columns of `schemas.ProjectSummary`
+    loaded; touching tasks or participants on the results raises instead of querying.
+    """
+    return (
+        select(models.Project)
+        .where(accessible_projects_filter(user_id))
+        .options(
+            load_only(
+                models.Project.title,
+                models.Project.description,
+                models.Project.owner_id,
+                models.Project.task_count,
+                models.Project.completed_count,
+            ),
+            raiseload("*"),
+        )
+    )
+
+
+def project_access_statement(project_id: int, user_id: int):
+    """
+    Single-row lookup of a project's own columns together with whether the user is
+    one of its participants, answered by an EXISTS on the `project_users` primary key.
+    Tasks and participants are not loaded; deleted projects are not found.
+    """
+    is_participant = exists().where(
+        models.project_users.c.project_id == project_id,
+        models.project_users.c.user_id == user_id,
+    )
+    return select(models.Project, is_participant.label("is_participant")).where(
+        models.Project.id == project_id, models.Project.deleted_at.is_(None)
+    )
+
+
+def participants_version_statement(project_id: int):
+    """
+    Sum of the participants' `users.version`, which grows with every change to any
+    participant's row; together with `projects.version`, which changes with the
+    membership, it validates responses that list the participants.
+    """
+    return (
+        select(func.coalesce(func.sum(models.User.version), 0))
+        .select_from(models.project_users)
+        .join(models.User, models.User.id == models.project_users.c.user_id)
+        .where(models.project_users.c.project_id == project_id)
+    )
+
+
+def projects_access_statement(project_ids: List[int], user_id: int):
+    """
+    `project_access_statement` for several projects at once: one row per existing,
+    non-deleted project among `project_ids`.
+    """
+    is_participant = exists().where(
+        models.project_users.c.project_id == models.Project.id,
+        models.project_users.c.user_id == user_id,
+    )
+    return select(models.Project, is_participant.label("is_participant")).where(
+        models.Project.id.in_(project_ids), models.Project.deleted_at.is_(None)
+    )
+
+
+def projects_progress_statement(user_id: int, ids: Optional[List[int]] = None):
+    """
+    One query returning (project_id, total, completed) for every project the user
+    can see, restricted to `ids` when given, read from the denormalized counters.
+    """
+    statement = (
+        select(models.Project.id, models.Project.task_count, models.Project.completed_count)
+        .where(accessible_projects_filter(user_id))
+    )
+    if ids:
+        statement = statement.where(models.Project.id.in_(ids))
+    return statement.order_by(models.Project.id)
+
+
+def progress_percent(total_tasks: int, completed_tasks: int) -> float:
+    return (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
+
+
+def progress_rows(rows) -> List[dict]:
+    return [
+        {
+            "project_id": project_id,
+            "total": total,
+            "completed": completed,
+            "progress": progress_percent(total, completed),
+        }
+        for project_id, total, completed in rows
+    ]
+
+
+def project_summaries(projects) -> List[dict]:
+    return [
+        {
+            "id": project.id,
+            "title": project.title,
+            "description": project.description,
+            "owner_id": project.owner_id,
+            "task_count": project.task_count,
+            "completed_count": project.completed_count,
+            "progress": progress_percent(project.task_count, project.completed_count),
+        }
+        for project in projects
+    ]
+
+
+def tasks_by_project_statement(project_id: int, is_completed: Optional[bool] = None):
+    statement = select(models.Task).where(models.Task.project_id == project_id)
+    if is_completed is not None:
+        statement = statement.where(models.Task.is_completed == is_completed)
+    return statement
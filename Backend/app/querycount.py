@@ -0,0 +1,143 @@
+"""
+SQL statement counting.
+
+Every statement executed by an engine created in `app.database` is counted
+against the counters active at that moment:
+
+- `count_queries()` counts everything run inside a `with` block, from any thread,
+  and with `keep_statements=True` also keeps their SQL. `assert_max_queries()` builds
+  on it to fail tests that exceed a statement budget, listing the statements:
+
+      with assert_max_queries(3):
+          client.get("/projects/", headers=headers)
+
+- `QueryCountMiddleware` counts the statements of each request (including work
+  done in the thread pool) and, with SQL_QUERY_COUNT_HEADER=true, reports the
+  number in an `X-Query-Count` response header. Request counters keep no SQL.
+
+Counters also accumulate the time spent executing their statements.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+SQL_QUERY_COUNT_HEADER = os.getenv("SQL_QUERY_COUNT_HEADER", "false").lower() in ("1", "true", "yes")
+
+
+class QueryCounter:
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str):
+        self.count += 1
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_request_counter: ContextVar[Optional[QueryCounter]] = ContextVar("request_query_counter", default=None)
+_block_counters: List[QueryCounter] = []
+_block_counters_lock = threading.Lock()
+
+
+def _active_counters() -> List[QueryCounter]:
+    counters = []
+    counter = _request_counter.get()
+    if counter is not None:
+        counters.append(counter)
+    if _block_counters:
+        with _block_counters_lock:
+            counters.extend(_block_counters)
+    return counters
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters = _active_counters()
+    for counter in counters:
+        counter.record(statement)
+    if counters:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_start_time")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for counter in _active_counters():
+        counter.seconds += elapsed
+
+
+def current_request_counter() -> Optional[QueryCounter]:
+    """
+    Returns the counter of the request being served, if any.
+    """
+    return _request_counter.get()
+
+
+@contextmanager
+def count_queries(keep_statements: bool = False) -> Iterator[QueryCounter]:
+    """
+    Counts the SQL statements executed by any engine while the block runs, keeping
+    their SQL in `statements` if `keep_statements` is set.
+    """
+    counter = QueryCounter(keep_statements)
+    with _block_counters_lock:
+        _block_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _block_counters_lock:
+            _block_counters.remove(counter)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """
+    Raises AssertionError, listing the statements, if the block executes more than `limit` of them.
+    """
+    with count_queries(keep_statements=True) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"{i}. {sql}" for i, sql in enumerate(counter.statements, start=1))
+        raise AssertionError(f"Expected at most {limit} SQL statements, {counter.count} were executed:\n{listing}")
+
+
+class QueryCountMiddleware:
+    """
+    ASGI middleware binding a `QueryCounter` to every HTTP request.
+    """
+
+    def __init__(self, app, expose_header: bool = SQL_QUERY_COUNT_HEADER):
+        self.app = app
+        self.expose_header = expose_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter()
+        token = _request_counter.set(counter)
+
+        async def send_with_count(message):
+            if self.expose_header and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode("latin-1"), str(counter.count).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _request_counter.reset(token)
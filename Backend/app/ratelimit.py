@@ -0,0 +1,206 @@
+"""
+Token-bucket rate limiting for the expensive unauthenticated and payment routes.
+
+A `RateLimit` policy is used as a route-level dependency, e.g.
+`@router.post("/login", dependencies=[Depends(ratelimit.LOGIN)])`. FastAPI resolves
+route-level dependencies before the endpoint's other dependencies, so rejected
+requests get 429 (with Retry-After) before any password hashing or database work.
+
+Each policy limits one or more keys of the request: the client IP, the email
+given in the JSON body and the user named by the bearer token. A request must
+find a token in the bucket of every key; a rejected request takes none, the
+tokens it took from its other keys are refunded. Buckets refill continuously at
+`rate` tokens per second up to `burst`.
+
+`InMemoryRateLimiter` keeps one (tokens, timestamp) pair per key, spread over
+RATE_LIMIT_SHARDS independently locked shards. A bucket that has been idle long
+enough to refill completely is equivalent to no bucket and is evicted. Each
+shard also holds at most RATE_LIMIT_MAX_KEYS / RATE_LIMIT_SHARDS buckets, dropping
+the least recently used. Limits are per worker; multi-worker deployments can
+install a shared backend with `set_rate_limit_backend`.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from app import metrics, utils
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 16))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# Only enable behind a proxy that overwrites X-Forwarded-For; clients can set it otherwise.
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+
+
+class RateLimitBackend:
+    def hit(self, key: str, rate: float, burst: float, cost: float = 1) -> Tuple[bool, float]:
+        """
+        Takes `cost` tokens from the bucket of `key`. Returns whether they were available
+        and, if not, the seconds until they will be.
+        """
+        raise NotImplementedError
+
+    def refund(self, key: str, rate: float, burst: float, cost: float = 1) -> None:
+        """
+        Puts back `cost` tokens taken from the bucket of `key` by a request that was then rejected.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class _Shard:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        # key -> (tokens, updated_at, full_at), least recently used first.
+        self.buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+class InMemoryRateLimiter(RateLimitBackend):
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._shards = [_Shard(max(max_keys // shards, 1)) for _ in range(shards)]
+        self.evictions = 0
+
+    def hit(self, key: str, rate: float, burst: float, cost: float = 1) -> Tuple[bool, float]:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.pop(key, None)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens, updated_at, _ = bucket
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            shard.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+            # Buckets at the front are the least recently used; drop those already refilled.
+            while shard.buckets:
+                oldest_key, (_, _, full_at) = next(iter(shard.buckets.items()))
+                if full_at > now and len(shard.buckets) <= shard.maxsize:
+                    break
+                del shard.buckets[oldest_key]
+                self.evictions += 1
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def refund(self, key: str, rate: float, burst: float, cost: float = 1) -> None:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.pop(key, None)
+            if bucket is None:
+                # Evicted since, i.e. already full again.
+                return
+            tokens, updated_at, _ = bucket
+            tokens = min(burst, tokens + (now - updated_at) * rate + cost)
+            shard.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+    def stats(self) -> dict:
+        return {
+            "shards": len(self._shards),
+            "keys": sum(len(shard.buckets) for shard in self._shards),
+            "evictions": self.evictions,
+        }
+
+
+limiter: RateLimitBackend = InMemoryRateLimiter()
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    """
+    Replaces the in-process limiter, e.g. with a backend shared by all workers.
+    """
+    global limiter
+    limiter = backend
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _body_email(request: Request) -> Optional[str]:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def _token_user(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = utils.decode_access_token(token)
+    return payload.get("sub") if payload else None
+
+
+class Limit:
+    def __init__(self, key: str, per_minute: float, burst: Optional[float] = None):
+        self.key = key
+        self.rate = per_minute / 60
+        self.burst = burst if burst is not None else per_minute
+
+
+class RateLimit:
+    """
+    Dependency enforcing every `Limit` of a named policy.
+    """
+
+    def __init__(self, name: str, *limits: Limit):
+        self.name = name
+        self.limits = limits
+
+    async def _keys(self, request: Request) -> List[Tuple[Limit, str]]:
+        keys = []
+        for limit in self.limits:
+            if limit.key == "ip":
+                value = client_ip(request)
+            elif limit.key == "email":
+                value = await _body_email(request)
+            else:
+                value = _token_user(request)
+            if value:
+                keys.append((limit, f"{self.name}:{limit.key}:{value}"))
+        return keys
+
+    async def __call__(self, request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        retry_after = None
+        taken = []
+        for limit, key in await self._keys(request):
+            allowed, wait = limiter.hit(key, limit.rate, limit.burst)
+            if allowed:
+                taken.append((limit, key))
+            else:
+                retry_after = max(retry_after or 0.0, wait)
+        if retry_after is not None:
+            for limit, key in taken:
+                limiter.refund(key, limit.rate, limit.burst)
+            metrics.RATE_LIMIT_REJECTIONS.labels(self.name).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+LOGIN = RateLimit("login", Limit("ip", per_minute=30, burst=10), Limit("email", per_minute=5, burst=5))
+REGISTER = RateLimit("register", Limit("ip", per_minute=10, burst=5))
+SUBSCRIBE = RateLimit("subscribe", Limit("ip", per_minute=20, burst=10), Limit("user", per_minute=5, burst=3))
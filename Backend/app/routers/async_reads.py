@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import models, schemas, database, queries, conditional, projectcache
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, PageParams, paginate_async
+from app.utils import get_current_user_async
+
+"""
+Asyncio versions of the most frequently polled read endpoints.
+
+Mounted ahead of the sync routers when DB_MODE=async, so these paths are served
+from the event loop through the async engine instead of the thread pool. They run
+the same statements as their sync counterparts in `app.queries`; relationships are
+always eager loaded because lazy loading is not available on an AsyncSession.
+The task list shares the project cache (`app.projectcache`) with the sync route.
+"""
+
+projects_router = APIRouter()
+tasks_router = APIRouter()
+
+
+@projects_router.get("/", response_model=List[schemas.Project], include_in_schema=False)
+async def get_user_projects(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    statement = queries.user_projects_statement(current_user.id)
+    return await paginate_async(db, statement, models.Project.id, page, response)
+
+
+@projects_router.get("/summary", response_model=List[schemas.ProjectSummary], include_in_schema=False)
+async def get_user_project_summaries(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    statement = queries.user_project_summaries_statement(current_user.id)
+    return queries.project_summaries(await paginate_async(db, statement, models.Project.id, page, response))
+
+
+@projects_router.get("/progress", response_model=List[schemas.ProjectProgress], include_in_schema=False)
+async def get_projects_progress(
+    ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    rows = (await db.execute(queries.projects_progress_statement(current_user.id, ids))).all()
+    return queries.progress_rows(rows)
+
+
+@tasks_router.get("/", response_model=List[schemas.Task], include_in_schema=False)
+async def get_tasks_by_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    is_completed: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(database.get_async_db),
+    project: projectcache.CachedProject = Depends(projectcache.cached_project_viewer_async)
+):
+    query = conditional.query_fingerprint(request)
+    etag = conditional.weak_etag("tasks", project_id, project.version, query)
+    not_modified = conditional.check_not_modified(request, response, etag, project.updated_at)
+    if not_modified:
+        return not_modified
+
+    statement = queries.tasks_by_project_statement(project_id, is_completed)
+    return await projectcache.cached_json_async(
+        project,
+        "tasks",
+        response,
+        List[schemas.Task],
+        lambda: paginate_async(db, statement, models.Task.id, page, response),
+        variant=query,
+        headers=(NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER),
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app import models, schemas, utils, database
+from app import models, schemas, utils, database, validators, ratelimit
 from jose import JWTError, jwt
 
 router = APIRouter(
@@ -16,13 +17,34 @@ Includes functionality for:
 - Logging in to obtain a JWT access token for authenticated operations.
 """
 
-@router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+def _create_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> models.User:
+    db_user = models.User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+def _validate_new_user(db: Session, user: schemas.UserCreate):
+    validators.validate_unique_email(user.email, db)
+    validators.validate_unique_username(user.username, db)
+
+
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+@router.post("/register", response_model=schemas.User, dependencies=[Depends(ratelimit.REGISTER)])
+async def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     """
     Registers a new user in the system.
 
     Validates that the email and username are unique before creating the user.
-    Hashes the password before storing it in the database.
+    Hashes the password on the password hashing executor before storing it in the database.
 
     Parameters:
         - user (schemas.UserCreate): The user's registration details (username, email, password).
@@ -30,40 +52,26 @@ def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
 
     Raises:
         - HTTPException (400): If the email or username already exists.
+        - HTTPException (429): If this IP made too many registration attempts.
+        - HTTPException (503): If the password hashing queue is full before the password is verified.
 
     Returns:
         - The newly created user as a JSON response.
     """
-    if db.query(models.User).filter(models.User.email == user.email).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered."
-        )
-    if db.query(models.User).filter(models.User.username == user.username).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already exists."
-        )
-
-    hashed_password = utils.hash_password(user.password)
-    db_user = models.User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    await run_in_threadpool(_validate_new_user, db, user)
+    hashed_password = await utils.hash_password_async(user.password)
+    return await run_in_threadpool(_create_user, db, user, hashed_password)
 
 
-@router.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(database.get_db)):
+@router.post("/login", response_model=schemas.Token, dependencies=[Depends(ratelimit.LOGIN)])
+async def login(user_credentials: schemas.UserLogin, db: Session = Depends(database.get_db)):
     """
     Authenticates a user and generates a JWT access token.
 
     Validates the provided email and password against the stored user credentials.
-    If the credentials are valid, generates a JWT access token for the user.
+    If the credentials are valid, generates a JWT access token for the user. Passwords
+    stored with an outdated bcrypt cost are transparently rehashed, unless the hashing
+    queue is full; then the rehash is left for a later login.
 
     Parameters:
         - user_credentials (schemas.UserLogin): The user's login details (email, password).
@@ -71,22 +79,33 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(database.ge
 
     Raises:
         - HTTPException (403): If the credentials are invalid.
+        - HTTPException (429): If this IP or email made too many login attempts.
+        - HTTPException (503): If the password hashing queue is full.
 
     Returns:
         - A JWT access token and its type as a JSON response.
     """
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, user_credentials.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid credentials."
         )
 
-    if not utils.verify_password(user_credentials.password, user.hashed_password):
+    if not await utils.verify_password_async(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid credentials."
         )
 
-    access_token = utils.create_access_token(data={"sub": user.username, "role": user.role})
+    token_data = {"sub": user.username, "role": user.role}
+    if utils.password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await utils.hash_password_async(user_credentials.password)
+        except utils.PasswordHashingBusy:
+            pass
+        else:
+            await run_in_threadpool(db.commit)
+
+    access_token = utils.create_access_token(data=token_data)
     return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+from app import database, dependencies, idempotency, projectcache, ratelimit, utils
+from app.pool import pool_status
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(dependencies.is_admin)]
+)
+
+"""
+Operational endpoints for administrators.
+"""
+
+@router.get("/pool")
+def get_pool_status():
+    """
+    Returns, for every engine of this worker, the checked-out, idle and overflow
+    connections together with the accumulated checkout wait times.
+    """
+    return {name: pool_status(pool) for name, pool in database.iter_pools()}
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """
+    Returns hit, miss and eviction counters of the in-process caches.
+    """
+    return {
+        "principals": utils.principal_cache.stats(),
+        "idempotency": idempotency.response_store.stats(),
+        "projects": projectcache.stats(),
+    }
+
+
+@router.get("/replicas")
+def get_replica_status():
+    """
+    Returns the last measured lag of every read replica and whether reads are routed to it.
+    """
+    return [replica.status() for replica in database.replica_router.replicas]
+
+
+@router.get("/rate-limits")
+def get_rate_limit_stats():
+    """
+    Returns the number of rate limit buckets tracked by this worker and how many were evicted.
+    """
+    return ratelimit.limiter.stats()
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, subqueryload
-from app import models, schemas, database, dependencies
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app import models, schemas, database, dependencies, queries, search, counters, conditional, events, bulkio, projectcache, purge
+from datetime import datetime
+from typing import Iterator, List, Optional
+from app.pagination import PageParams, paginate
 
 router = APIRouter()
 
@@ -29,118 +33,118 @@ def create_project(
 """
 @router.get("/", response_model=List[schemas.Project])
 def get_user_projects(
-    db: Session = Depends(database.get_db),
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(dependencies.get_current_user)
 ):
-    projects = (
-        db.query(models.Project)
-        .filter(
-            (models.Project.owner_id == current_user.id) |
-            (models.Project.participants.any(id=current_user.id))
-        )
-        .all()
-    )
-    return projects
+    statement = queries.user_projects_statement(current_user.id)
+    return paginate(db, statement, models.Project.id, page, response)
+
+"""
+    Unit to retrieve a lightweight summary (title, description and progress) of all projects
+    owned by or shared with the authenticated user, without their tasks or participants.
+"""
+@router.get("/summary", response_model=List[schemas.ProjectSummary])
+def get_user_project_summaries(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(dependencies.get_current_user)
+):
+    statement = queries.user_project_summaries_statement(current_user.id)
+    return queries.project_summaries(paginate(db, statement, models.Project.id, page, response))
+
+"""
+    Unit to calculate the progress of every project the authenticated user can see,
+    or of the given project ids, with a single grouped query.
+"""
+@router.get("/progress", response_model=List[schemas.ProjectProgress])
+def get_projects_progress(
+    ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(dependencies.get_current_user)
+):
+    rows = db.execute(queries.projects_progress_statement(current_user.id, ids)).all()
+    return queries.progress_rows(rows)
 
 """
     Unit to retrieve a specific project by ID, verifying user access permissions.
+    Answers 304 Not Modified without loading the tasks or participants if the client's copy is current,
+    and serves the response from the project cache when possible. The ETag covers the participants'
+    user rows too; there is no Last-Modified, since user changes do not touch the project's date.
 """
 @router.get("/{project_id}", response_model=schemas.Project)
 def get_project(
-    project_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+    request: Request,
+    response: Response,
+    db: Session = Depends(database.get_read_db),
+    project: projectcache.CachedProject = Depends(projectcache.cached_project_viewer)
 ):
-    db_project = (
-        db.query(models.Project)
-        .options(
-            subqueryload(models.Project.tasks),
-            subqueryload(models.Project.participants)
-        )
-        .filter(models.Project.id == project_id)
-        .first()
-    )
-    if not db_project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-
-    if db_project.owner_id != current_user.id and current_user not in db_project.participants:
-        if not current_user.is_subscribed:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this project"
-            )
+    participants = db.scalar(queries.participants_version_statement(project.id))
+    etag = conditional.weak_etag("project", project.id, project.version, participants)
+    not_modified = conditional.check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
 
-    return db_project
+    return projectcache.cached_json(
+        db, project, "project", response, schemas.Project, lambda: project.load(db), variant=participants
+    )
 
 """
     Unit to update a specific project's details, restricted to the project owner.
 """
-@router.put("/{project_id}", response_model=schemas.Project)
+@router.put("/{project_id}", response_model=schemas.Project, dependencies=[Depends(dependencies.is_subscribed)])
 def update_project(
     project_id: int,
     project: schemas.ProjectUpdate,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(dependencies.is_subscribed)
+    db_project: models.Project = Depends(dependencies.project_owner)
 ):
-    db_project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    if db_project.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this project")
-
     if project.title:
         db_project.title = project.title
     if project.description:
         db_project.description = project.description
+    db_project.version = models.Project.version + 1
 
     db.commit()
     db.refresh(db_project)
+    events.publish(project_id, "project.updated", title=db_project.title, description=db_project.description)
     return db_project
 
 """
     Unit to delete a specific project, restricted to the project owner.
+    Tasks and memberships go with it through the foreign keys; projects with more than
+    PROJECT_SOFT_DELETE_THRESHOLD tasks are hidden at once and removed later by `app.purge`.
 """
-@router.delete("/{project_id}")
+@router.delete("/{project_id}", dependencies=[Depends(dependencies.is_subscribed)])
 def delete_project(
     project_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(dependencies.is_subscribed)
+    db_project: models.Project = Depends(dependencies.project_owner)
 ):
-    db_project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(db_project)
+    if db_project.task_count > purge.PROJECT_SOFT_DELETE_THRESHOLD:
+        db_project.deleted_at = datetime.utcnow()
+        db_project.version = models.Project.version + 1
+    else:
+        db.delete(db_project)
     db.commit()
+    events.publish(project_id, "project.deleted")
     return {"detail": "Project deleted successfully"}
 
 """
-    Unit to search for users by name or email who are not part of the project.
+    Unit to search for users by name or email who are not part of the project,
+    returning the best `limit` matches ranked by relevance.
 """
 @router.get("/{project_id}/search_users", response_model=List[schemas.UserBase])
 def search_users(
     project_id: int,
     query: str, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+    limit: int = Query(search.SEARCH_RESULT_LIMIT, ge=1, le=search.SEARCH_MAX_RESULT_LIMIT),
+    db: Session = Depends(database.get_read_db),
+    project: models.Project = Depends(dependencies.read_project_owner)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
-
-    if project.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="No tienes permisos para acceder a este proyecto.")
-
-    users = (
-        db.query(models.User)
-        .filter(
-            (models.User.username.ilike(f"%{query}%")) | 
-            (models.User.email.ilike(f"%{query}%")),
-            ~models.User.joined_projects.any(id=project_id),
-        )
-        .all()
-    )
-    return [{"id": user.id, "username": user.username, "email": user.email} for user in users]
+    return search.search_users(db, query, project_id, limit)
 
 """
     Unit to add a user to a project as a participant, restricted to the project owner.
@@ -151,18 +155,10 @@ def add_user_to_project(
     request: schemas.AddUserRequest, 
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(dependencies.is_subscribed),
+    project: models.Project = Depends(dependencies.project_owner),
 ):
     user_id = request.user_id 
 
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
-
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=403, detail="No tienes permisos para modificar este proyecto."
-        )
-
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -171,8 +167,10 @@ def add_user_to_project(
         raise HTTPException(status_code=400, detail="El usuario ya está en este proyecto.")
 
     project.participants.append(user)
+    counters.touch_project(db, project_id)
     db.commit()
     db.refresh(project)
+    events.publish(project_id, "participant.added", participant={"id": user.id, "username": user.username})
 
     return schemas.ProjectWithParticipants(
         project_id=project.id,
@@ -184,42 +182,112 @@ def add_user_to_project(
     Unit to calculate the progress of a project based on completed tasks.
 """
 @router.get("/{project_id}/progress")
-def get_project_progress(project_id: int, db: Session = Depends(database.get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+def get_project_progress(project_id: int, db: Session = Depends(database.get_read_db)):
+    project = (
+        db.query(models.Project.task_count, models.Project.completed_count)
+        .filter(models.Project.id == project_id, models.Project.deleted_at.is_(None))
+        .first()
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    total_tasks = len(project.tasks)
-    completed_tasks = len([task for task in project.tasks if task.is_completed])
-
-    progress = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
-    return {"progress": progress}
+    total_tasks, completed_tasks = project
+    return {"progress": queries.progress_percent(total_tasks, completed_tasks)}
 
 """
     Unit to retrieve all participants of a project.
+    Answers 304 Not Modified without loading the participants if the client's copy is current,
+    and serves the response from the project cache when possible, validated like `get_project`.
 """
 @router.get("/{project_id}/users", response_model=List[schemas.User])
 def get_project_users(
-    project_id: int,
-    current_user: models.User = Depends(dependencies.get_current_user),
-    db: Session = Depends(database.get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(database.get_read_db),
+    project: projectcache.CachedProject = Depends(projectcache.cached_project_viewer)
 ):
-    project = (
-        db.query(models.Project)
-        .options(subqueryload(models.Project.participants))
-        .filter(models.Project.id == project_id)
-        .first()
+    participants = db.scalar(queries.participants_version_statement(project.id))
+    etag = conditional.weak_etag("project-users", project.id, project.version, participants)
+    not_modified = conditional.check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    return projectcache.cached_json(
+        db, project, "users", response, List[schemas.User], lambda: project.load(db).participants,
+        variant=participants,
     )
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
 
-    if current_user not in project.participants and project.owner_id != current_user.id:
-        if not current_user.is_subscribed:
-            raise HTTPException(
-                status_code=403, detail="You do not have access to this project."
-            )
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
 
-    return project.participants
+def _stream_task_export(project_id: int, fmt: str, bind) -> Iterator[bytes]:
+    """
+    Yields the project's tasks encoded as `fmt`, in chunks of about EXPORT_CHUNK_BYTES.
 
+    Runs with its own session on `bind`, the engine of the request's read session,
+    because the request's session is closed before the response body is sent; rows
+    are fetched EXPORT_BATCH_SIZE at a time through a server-side cursor where the
+    driver supports one.
+    """
+    entity = bulkio.ENTITIES["tasks"]
+    db = database.SessionLocal(bind=bind)
+    try:
+        rows = db.execute(
+            entity.export_statement
+            .where(models.Task.project_id == project_id)
+            .order_by(models.Task.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).mappings()
+        records = ({name: row[name] for name in entity.field_names} for row in rows)
+        chunk, size = [], 0
+        for piece in bulkio.encode_records(records, entity, fmt):
+            chunk.append(piece)
+            size += len(piece)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(chunk).encode("utf-8")
+                chunk, size = [], 0
+        yield "".join(chunk).encode("utf-8")
+    finally:
+        db.close()
 
+"""
+    Unit to download all tasks of a project as NDJSON, CSV or a JSON array, streamed
+    without loading the tasks into memory.
+"""
+@router.get("/{project_id}/export")
+def export_project_tasks(
+    project_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|json)$"),
+    project: models.Project = Depends(dependencies.read_project_viewer),
+    db: Session = Depends(database.get_read_db)
+):
+    return StreamingResponse(
+        _stream_task_export(project_id, format, db.get_bind()),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-tasks.{format}"'},
+    )
 
+"""
+    Unit to stream the task and participant changes of a project as Server-Sent Events.
+"""
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: int,
+    project: models.Project = Depends(dependencies.read_project_viewer),
+    db: Session = Depends(database.get_read_db)
+):
+    # Release the pooled connection now; the stream may stay open for hours.
+    await run_in_threadpool(db.close)
+
+    subscription = events.broker.subscribe(project_id)
+    return StreamingResponse(
+        events.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
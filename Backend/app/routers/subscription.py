@@ -3,7 +3,7 @@ from random import choice
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from app.constants import SUBSCRIPTION_PLANS
-from app import models, schemas, database
+from app import models, schemas, database, ratelimit
 from typing import List
 from app.utils import get_current_user
 
@@ -11,7 +11,7 @@ from app.utils import get_current_user
 router = APIRouter()
 
 
-@router.post("/payment/subscribe")
+@router.post("/payment/subscribe", dependencies=[Depends(ratelimit.SUBSCRIBE)])
 
 
 def simulate_payment(
@@ -36,6 +36,7 @@ def simulate_payment(
         - HTTPException (400): If the user already has an active subscription.
         - HTTPException (400): If the requested subscription plan is invalid.
         - HTTPException (402): If the simulated payment fails.
+        - HTTPException (429): If this IP or user made too many payment attempts.
 
     Returns:
         - JSON response containing a success message and the subscription end date.
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app import models, schemas, database
-from app.utils import hash_password
+from app.utils import hash_password_async
 import os
 from dotenv import load_dotenv
 
@@ -13,23 +14,11 @@ SECRET_TOKEN = os.getenv("SECRET_TOKEN")
 
 router = APIRouter()
 
-@router.post("/create-superuser")
-def create_superuser(
-    user: schemas.UserCreate,  
-    token: str = Header(...),  
-    db: Session = Depends(database.get_db)
-):
-    """
-      Creates a unique superuser, using a secret token in the request header.
-    """
-    if token != SECRET_TOKEN:
-        raise HTTPException(status_code=403, detail="Invalid token. Unauthorized.")
+def _superuser_exists(db: Session) -> bool:
+    return db.query(models.User).filter(models.User.role == "superuser").first() is not None
 
-    existing_superuser = db.query(models.User).filter(models.User.role == "superuser").first()
-    if existing_superuser:
-        raise HTTPException(status_code=400, detail="Superuser already exists.")
 
-    hashed_password = hash_password(user.password)
+def _create_superuser(db: Session, user: schemas.UserCreate, hashed_password: str) -> models.User:
     superuser = models.User(
         username=user.username,
         email=user.email,
@@ -41,6 +30,24 @@ def create_superuser(
     db.add(superuser)
     db.commit()
     db.refresh(superuser)
-
     return superuser
 
+
+@router.post("/create-superuser")
+async def create_superuser(
+    user: schemas.UserCreate,  
+    token: str = Header(...),  
+    db: Session = Depends(database.get_db)
+):
+    """
+      Creates a unique superuser, using a secret token in the request header.
+    """
+    if token != SECRET_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid token. Unauthorized.")
+
+    if await run_in_threadpool(_superuser_exists, db):
+        raise HTTPException(status_code=400, detail="Superuser already exists.")
+
+    hashed_password = await hash_password_async(user.password)
+    return await run_in_threadpool(_create_superuser, db, user, hashed_password)
+
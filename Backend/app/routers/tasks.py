@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, subqueryload
 from app.utils import get_current_user
-from app import models, schemas, database, dependencies
-from typing import List
+from app import models, schemas, database, dependencies, queries, counters, conditional, events, projectcache
+from typing import List, Optional
 from app.dependencies import is_subscribed
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, PageParams, paginate
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Task, dependencies=[Depends(is_subscribed)])
 
-def create_task(task: schemas.TaskCreate, db: Session = Depends(database.get_db)):
+def _task_event(task: models.Task) -> dict:
+    return schemas.Task.model_validate(task, from_attributes=True).model_dump()
+
+
+@router.post("/", response_model=schemas.Task)
+
+def create_task(
+    task: schemas.TaskCreate,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(is_subscribed)
+):
 
     """
     Creates a new task and associates it with an existing project.
@@ -20,6 +31,7 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(database.get_db)
     Parameters:
         - task (schemas.TaskCreate): Contains the details of the task to be created (title, description, is_completed, and project_id).
         - db (Session): The database session (injected via dependency).
+        - current_user (models.User): The authenticated, subscribed user (injected via dependency).
 
     Dependencies:
         - is_subscribed: Ensures the user has an active subscription.
@@ -31,9 +43,7 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(database.get_db)
         - The newly created task as a JSON response.
 """
 
-    db_project = db.query(models.Project).filter(models.Project.id == task.project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    dependencies.project_viewer.authorize(db, task.project_id, current_user)
 
     db_task = models.Task(
         title=task.title,
@@ -42,31 +52,159 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(database.get_db)
         project_id=task.project_id  
     )
     db.add(db_task)
+    counters.touch_project(db, task.project_id, 1, 1 if task.is_completed else 0)
     db.commit()
     db.refresh(db_task)
+    events.publish(db_task.project_id, "task.created", tasks=[_task_event(db_task)])
     return db_task
 
 @router.get("/", response_model=List[schemas.Task])
 def get_tasks_by_project(
     project_id: int, 
+    request: Request,
+    response: Response,
+    is_completed: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_read_db),
+    project: projectcache.CachedProject = Depends(projectcache.cached_project_viewer)
+):
+    """
+    Retrieve one page of tasks for a specific project, optionally filtered by status.
+
+    Answers 304 Not Modified without loading any task if the project has not
+    changed since the version the client holds, and serves the page from the
+    project cache when possible.
+    """
+    query = conditional.query_fingerprint(request)
+    etag = conditional.weak_etag("tasks", project_id, project.version, query)
+    not_modified = conditional.check_not_modified(request, response, etag, project.updated_at)
+    if not_modified:
+        return not_modified
+
+    statement = queries.tasks_by_project_statement(project_id, is_completed)
+    return projectcache.cached_json(
+        db,
+        project,
+        "tasks",
+        response,
+        List[schemas.Task],
+        lambda: paginate(db, statement, models.Task.id, page, response),
+        variant=query,
+        headers=(NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER),
+    )
+
+def _bulk_results(task_ids: List[int], found: dict, allowed_project_ids: set, done_status: str):
+    """
+    Splits the requested ids into the ones that may be written and the per-item results.
+    """
+    writable, results = [], []
+    for task_id in dict.fromkeys(task_ids):
+        if task_id not in found:
+            results.append({"id": task_id, "status": "not_found", "detail": "Task not found"})
+        elif found[task_id] not in allowed_project_ids:
+            results.append({"id": task_id, "status": "forbidden", "detail": "You do not have permission to modify this task."})
+        else:
+            writable.append(task_id)
+            results.append({"id": task_id, "status": done_status})
+    return writable, results
+
+
+def _find_tasks(db: Session, task_ids: List[int]) -> dict:
+    rows = db.query(models.Task.id, models.Task.project_id).filter(models.Task.id.in_(task_ids)).all()
+    return dict(rows)
+
+
+@router.post("/bulk", response_model=List[schemas.TaskBulkResult])
+def create_tasks_bulk(
+    payload: schemas.TaskBulkCreate,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(is_subscribed)
 ):
     """
-    Retrieve all tasks for a specific project.
+    Creates many tasks in one project with a single multi-row INSERT.
+
+    Raises:
+        - HTTPException (404): If the project is not found.
+
+    Returns:
+        - One result per submitted task, in submission order, with the new task ID.
     """
-    tasks = (
-        db.query(models.Task)
-        .options(subqueryload(models.Task.project))
-        .filter(models.Task.project_id == project_id)
-        .all()
+    dependencies.project_viewer.authorize(db, payload.project_id, current_user)
+
+    rows = [
+        {
+            "title": task.title,
+            "description": task.description,
+            "is_completed": task.is_completed,
+            "project_id": payload.project_id,
+        }
+        for task in payload.tasks
+    ]
+    task_ids = db.scalars(
+        insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True), rows
+    ).all()
+    counters.touch_project(
+        db, payload.project_id, len(rows), sum(1 for row in rows if row["is_completed"])
+    )
+    db.commit()
+    events.publish(
+        payload.project_id,
+        "task.created",
+        tasks=[{"id": task_id, **row} for task_id, row in zip(task_ids, rows)],
     )
-    return tasks
+    return [{"id": task_id, "status": "created"} for task_id in task_ids]
+
+@router.patch("/bulk/status", response_model=List[schemas.TaskBulkResult])
+def update_tasks_status_bulk(
+    payload: schemas.TaskBulkStatusUpdate,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(is_subscribed)
+):
+    """
+    Sets the completion status of many tasks with a single UPDATE.
+
+    Like `PUT /tasks/{id}/status`, restricted to the owners of the tasks' projects.
+    Tasks that do not exist or belong to projects the user does not own are
+    reported per item and left untouched.
+    """
+    found = _find_tasks(db, payload.task_ids)
+    allowed = dependencies.project_owner.allowed_ids(db, set(found.values()), current_user)
+    writable, results = _bulk_results(payload.task_ids, found, allowed, "updated")
+
+    if writable:
+        changed = counters.set_tasks_completed(db, writable, payload.is_completed)
+        db.commit()
+        for project_id, task_ids in changed.items():
+            events.publish(project_id, "task.status", task_ids=task_ids, is_completed=payload.is_completed)
+    return results
+
+@router.delete("/bulk", response_model=List[schemas.TaskBulkResult])
+def delete_tasks_bulk(
+    payload: schemas.TaskBulkDelete,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(is_subscribed)
+):
+    """
+    Deletes many tasks with a single DELETE.
+
+    Restricted to the owners of the tasks' projects. Tasks that do not exist or
+    belong to projects the user does not own are reported per item and left untouched.
+    """
+    found = _find_tasks(db, payload.task_ids)
+    allowed = dependencies.project_owner.allowed_ids(db, set(found.values()), current_user)
+    writable, results = _bulk_results(payload.task_ids, found, allowed, "deleted")
+
+    if writable:
+        deleted = counters.delete_tasks(db, writable)
+        db.commit()
+        for project_id, task_ids in deleted.items():
+            events.publish(project_id, "task.deleted", task_ids=task_ids)
+    return results
 
 @router.get("/{task_id}", response_model=schemas.Task)
 def get_task(
     task_id: int, 
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
@@ -82,18 +220,30 @@ def get_task(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     return db_task
 
-@router.put("/{task_id}", response_model=schemas.Task, dependencies=[Depends(is_subscribed)])
-def update_task(task_id: int, task: schemas.TaskUpdate, db: Session = Depends(database.get_db)):
+@router.put("/{task_id}", response_model=schemas.Task)
+def update_task(
+    task_id: int,
+    task: schemas.TaskUpdate,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(is_subscribed),
+):
+    """
+    Update the title, description and status of a task, restricted to the project owner.
+    """
     db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not db_task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
+    dependencies.project_owner.authorize(db, db_task.project_id, current_user)
+
     db_task.title = task.title
     db_task.description = task.description
-    db_task.is_completed = task.is_completed
+    counters.set_tasks_completed(db, [task_id], task.is_completed)
+    counters.touch_project(db, db_task.project_id)
 
     db.commit()
     db.refresh(db_task)
+    events.publish(db_task.project_id, "task.updated", tasks=[_task_event(db_task)])
     return db_task
 
 @router.put("/{task_id}/status", response_model=schemas.Task)
@@ -104,22 +254,19 @@ def update_task_status(
     current_user: models.User = Depends(get_current_user),
 ):
     """
-    Update the completion status of a task (completed or pending).
+    Update the completion status of a task (completed or pending), restricted to the project owner.
     """
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    project = db.query(models.Project).filter(models.Project.id == task.project_id).first()
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to modify this task."
-        )
+    dependencies.project_owner.authorize(db, task.project_id, current_user)
 
-    task.is_completed = is_completed
+    changed = counters.set_tasks_completed(db, [task_id], is_completed)
     db.commit()
     db.refresh(task)
+    if changed:
+        events.publish(task.project_id, "task.updated", tasks=[_task_event(task)])
     return task
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -129,12 +276,19 @@ def delete_task(
     current_user: models.User = Depends(get_current_user)
 ):
     """
-    Delete a specific task by ID.
+    Delete a specific task by ID, restricted to the project owner.
     """
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not db_task:
+    project_id = db.query(models.Task.project_id).filter(models.Task.id == task_id).scalar()
+    if project_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+
+    dependencies.project_owner.authorize(db, project_id, current_user)
+
+    deleted = counters.delete_tasks(db, [task_id])
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    db.delete(db_task)
     db.commit()
+    for project_id, task_ids in deleted.items():
+        events.publish(project_id, "task.deleted", task_ids=task_ids)
     return
\ No newline at end of file
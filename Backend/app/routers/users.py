@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import schemas, models, database, utils, validators, dependencies
+from app.pagination import PageParams, paginate
 
 
 router = APIRouter()
@@ -16,13 +19,26 @@ router = APIRouter()
     - Update a user's role (admin access required).
 """
 
+def _validate_new_user(db: Session, user: schemas.UserCreate):
+    validators.validate_unique_email(user.email, db)
+    validators.validate_unique_username(user.username, db)
+
+
+def _create_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> models.User:
+    db_user = models.User(username=user.username, email=user.email, hashed_password=hashed_password)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
 @router.post("/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     """
     Creates a new user in the system.
 
     Validates that the provided email and username are unique before creating the user.
-    Hashes the password before storing it in the database.
+    Hashes the password on the password hashing executor before storing it in the database.
 
     Parameters:
         - user (schemas.UserCreate): The user details (username, email, and password).
@@ -30,39 +46,47 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)
 
     Raises:
         - HTTPException (400): If the email or username already exists.
+        - HTTPException (503): If the password hashing queue is full.
 
     Returns:
         - The newly created user as a JSON response.
     """
-    validators.validate_unique_email(user.email, db)
-    validators.validate_unique_username(user.username, db)
-
-    hashed_password = utils.hash_password(user.password)
-    db_user = models.User(username=user.username, email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
-    return db_user
+    await run_in_threadpool(_validate_new_user, db, user)
+    hashed_password = await utils.hash_password_async(user.password)
+    return await run_in_threadpool(_create_user, db, user, hashed_password)
 
 
 @router.get("/", response_model=List[schemas.User])
-def get_all_users(db: Session = Depends(database.get_db)):
+def get_all_users(
+    response: Response,
+    role: Optional[str] = None,
+    is_subscribed: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_read_db),
+):
     """
-    Retrieves a list of all users in the database.
+    Retrieves one page of users, ordered by ID.
 
     Parameters:
+        - role (str, optional): Only return users with this role.
+        - is_subscribed (bool, optional): Only return subscribed or unsubscribed users.
+        - page (PageParams): `limit`, `cursor` and `include_total` query parameters.
         - db (Session): The database session (injected via dependency).
 
     Returns:
-        - A list of all users as a JSON response.
+        - A list of users as a JSON response. The cursor for the next page is sent
+          in the `X-Next-Cursor` header and the total count in `X-Total-Count`.
     """
-    users = db.query(models.User).all()
-    return users
+    statement = select(models.User)
+    if role is not None:
+        statement = statement.where(models.User.role == role)
+    if is_subscribed is not None:
+        statement = statement.where(models.User.is_subscribed == is_subscribed)
+    return paginate(db, statement, models.User.id, page, response)
 
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(database.get_db)):
+def read_user(user_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieves a specific user by their ID.
 
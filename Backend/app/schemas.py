@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
+from app.constants import MAX_BULK_TASKS
 
 class TaskBase(BaseModel):
     title: str
@@ -22,6 +23,22 @@ class Task(TaskCreate):
     class Config:
         orm_mode = True  
 
+class TaskBulkCreate(BaseModel):
+    project_id: int
+    tasks: List[TaskBase] = Field(..., min_length=1, max_length=MAX_BULK_TASKS)
+
+class TaskBulkStatusUpdate(BaseModel):
+    task_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_TASKS)
+    is_completed: bool
+
+class TaskBulkDelete(BaseModel):
+    task_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_TASKS)
+
+class TaskBulkResult(BaseModel):
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
 class ProjectBase(BaseModel):
     title: str
     description: Optional[str]
@@ -38,6 +55,19 @@ class Project(ProjectBase):
     class Config:
         orm_mode = True
 
+class ProjectSummary(ProjectBase):
+    id: int
+    owner_id: int
+    task_count: int
+    completed_count: int
+    progress: float
+
+class ProjectProgress(BaseModel):
+    project_id: int
+    total: int
+    completed: int
+    progress: float
+
 class ProjectUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
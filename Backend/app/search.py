@@ -0,0 +1,95 @@
+"""
+User search for the project invite box.
+
+On PostgreSQL usernames and emails are matched by trigram word similarity (the
+term against the best matching extent of the value, so "smith" finds
+"john.smith@example.com") and read nearest first from pg_trgm GiST indexes: one
+index-ordered KNN scan per column, each stopping after `limit` rows, merged and
+ranked by distance. Terms need at least TRIGRAM_MIN_QUERY_LENGTH characters there,
+since shorter ones have no complete trigram to look up. Other databases fall back
+to a case-insensitive prefix match served by indexes on lower(username) and
+lower(email), ranked by exact match and then by length. Queries shorter than
+SEARCH_MIN_QUERY_LENGTH return nothing without touching the database.
+"""
+
+import os
+from typing import List
+from sqlalchemy import Float, case, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+from app import models
+
+SEARCH_MIN_QUERY_LENGTH = int(os.getenv("SEARCH_MIN_QUERY_LENGTH", 3))
+SEARCH_RESULT_LIMIT = int(os.getenv("SEARCH_RESULT_LIMIT", 10))
+SEARCH_MAX_RESULT_LIMIT = int(os.getenv("SEARCH_MAX_RESULT_LIMIT", 50))
+TRIGRAM_MIN_QUERY_LENGTH = 3
+
+# Highest code point, used as the upper bound of prefix range scans.
+_PREFIX_END = "\U0010ffff"
+
+
+def _trigram_statement(term: str, not_participant, limit: int):
+    nearest = []
+    for column in (models.User.username, models.User.email):
+        # `term <<-> column` is 1 - word_similarity(term, column); `term <% column` applies
+        # pg_trgm.word_similarity_threshold. Both are answered by the GiST index on `column`.
+        distance = literal(term).op("<<->", return_type=Float)(column)
+        nearest.append(
+            select(models.User.id, models.User.username, models.User.email, distance.label("distance"))
+            .where(literal(term).op("<%")(column), not_participant)
+            .order_by(distance)
+            .limit(limit)
+        )
+    candidates = union_all(*nearest).subquery()
+    distance = func.min(candidates.c.distance)
+    return (
+        select(candidates.c.id, candidates.c.username, candidates.c.email)
+        .group_by(candidates.c.id, candidates.c.username, candidates.c.email)
+        .order_by(distance, candidates.c.id)
+        .limit(limit)
+    )
+
+
+def _prefix_statement(term: str, not_participant, limit: int):
+    term = term.lower()
+    username = func.lower(models.User.username)
+    email = func.lower(models.User.email)
+    return (
+        select(models.User.id, models.User.username, models.User.email)
+        .where(
+            or_(
+                (username >= term) & (username < term + _PREFIX_END),
+                (email >= term) & (email < term + _PREFIX_END),
+            ),
+            not_participant,
+        )
+        .order_by(
+            case((username == term, 0), (email == term, 0), else_=1),
+            func.length(models.User.username),
+            models.User.id,
+        )
+        .limit(limit)
+    )
+
+
+def search_users(db: Session, term: str, exclude_project_id: int, limit: int = SEARCH_RESULT_LIMIT) -> List[dict]:
+    """
+    Returns up to `limit` users matching `term`, best match first, who are not
+    participants of the project `exclude_project_id`.
+    """
+    term = term.strip()
+    if len(term) < SEARCH_MIN_QUERY_LENGTH:
+        return []
+
+    not_participant = ~models.User.joined_projects.any(id=exclude_project_id)
+    limit = min(limit, SEARCH_MAX_RESULT_LIMIT)
+    if db.get_bind().dialect.name == "postgresql":
+        if len(term) < TRIGRAM_MIN_QUERY_LENGTH:
+            return []
+        statement = _trigram_statement(term, not_participant, limit)
+    else:
+        statement = _prefix_statement(term, not_participant, limit)
+
+    return [
+        {"id": user_id, "username": username, "email": email}
+        for user_id, username, email in db.execute(statement)
+    ]
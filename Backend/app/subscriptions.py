@@ -0,0 +1,124 @@
+"""
+Subscription expiry sweeper.
+
+`dependencies.is_subscribed` only reads the `is_subscribed` flag, so expired
+subscriptions must be switched off in the database. The sweeper does this in
+batches of SUBSCRIPTION_SWEEP_BATCH_SIZE, each a single UPDATE driven by the
+`users.subscription_end_date` index, and drops the affected users from the
+principal cache.
+
+It runs every SUBSCRIPTION_SWEEP_INTERVAL_SECONDS inside each API worker (0
+disables it) and can also run as a standalone worker with
+`python -m app.cli sweep-subscriptions --loop`. On PostgreSQL a transaction-level
+advisory lock lets only one process sweep at a time. Other workers' principal
+caches may keep an expired user for up to PRINCIPAL_CACHE_TTL seconds.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app import database, metrics, models
+from app.utils import invalidate_principal
+
+SUBSCRIPTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SUBSCRIPTION_SWEEP_INTERVAL_SECONDS", 60))
+SUBSCRIPTION_SWEEP_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_SWEEP_BATCH_SIZE", 1000))
+
+SWEEP_LOCK_ID = 72_101_019
+
+logger = logging.getLogger(__name__)
+
+
+def _acquire_sweep_lock(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return db.scalar(select(func.pg_try_advisory_xact_lock(SWEEP_LOCK_ID)))
+
+
+def expire_due_subscriptions(db: Session, now: Optional[datetime] = None, batch_size: int = SUBSCRIPTION_SWEEP_BATCH_SIZE) -> int:
+    """
+    Clears `is_subscribed` on every user whose subscription ended before `now`,
+    committing after each batch of at most `batch_size` users.
+
+    Returns the number of subscriptions expired.
+    """
+    now = now or datetime.utcnow()
+    due = (
+        select(models.User.id)
+        .where(models.User.is_subscribed == True, models.User.subscription_end_date < now)
+        .limit(batch_size)
+    )
+    expired = 0
+    while True:
+        if not _acquire_sweep_lock(db):
+            db.rollback()
+            return expired
+
+        usernames = db.scalars(
+            update(models.User)
+            .where(models.User.id.in_(due.scalar_subquery()))
+            .values(is_subscribed=False)
+            .returning(models.User.username),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.commit()
+
+        for username in usernames:
+            invalidate_principal(username)
+        expired += len(usernames)
+        if len(usernames) < batch_size:
+            return expired
+
+
+def sweep() -> int:
+    """
+    Runs one sweep with its own session and records it in the sweep metrics.
+    """
+    start = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        expired = expire_due_subscriptions(db)
+    except Exception:
+        metrics.SUBSCRIPTION_SWEEP_FAILURES.inc()
+        raise
+    finally:
+        db.close()
+    metrics.SUBSCRIPTION_SWEEP_DURATION.observe(time.perf_counter() - start)
+    metrics.SUBSCRIPTIONS_EXPIRED.inc(expired)
+    metrics.SUBSCRIPTION_SWEEP_LAST_SUCCESS.set(time.time())
+    if expired:
+        logger.info("Expired %d subscriptions", expired)
+    return expired
+
+
+async def run_sweeper(interval: float = SUBSCRIPTION_SWEEP_INTERVAL_SECONDS):
+    """
+    Sweeps every `interval` seconds until cancelled; failures are logged and retried next time.
+    """
+    while True:
+        try:
+            await run_in_threadpool(sweep)
+        except Exception:
+            logger.exception("Subscription sweep failed")
+        await asyncio.sleep(interval)
+
+
+def start_sweeper() -> Optional[asyncio.Task]:
+    if SUBSCRIPTION_SWEEP_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(run_sweeper())
+
+
+async def stop_sweeper(task: Optional[asyncio.Task]):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -1,13 +1,19 @@
 import os
+import asyncio
+import threading
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from jose import jwt
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from typing import List
-from app.database import get_db
+from app.cache import CacheBackend, TTLCache
+from app.database import get_async_db, get_db
 from app.models import User 
 
 
@@ -17,14 +23,18 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")  
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 64))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
 def hash_password(password: str) -> str:
-    import bcrypt
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password.decode('utf-8')
 
@@ -33,6 +43,53 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True if the hash was stored with a bcrypt cost other than BCRYPT_ROUNDS.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+"""
+Password hashing runs on its own bounded executor instead of the request thread pool,
+so a login or registration spike cannot starve unrelated requests. bcrypt releases
+the GIL, so threads hash in parallel. At most PASSWORD_HASH_QUEUE_LIMIT hashes may be
+running or waiting at once; beyond that requests are rejected immediately with 503.
+"""
+
+class PasswordHashingBusy(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests. Please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE_LIMIT)
+
+
+async def _run_password_hashing(function, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, function, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_hashing(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -47,22 +104,107 @@ def decode_access_token(token: str):
     except jwt.JWTError:
         return None
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_token_subject(token: str) -> str:
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     username = payload.get("sub")
     if username is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    return username
+
+"""
+Principal cache.
+
+Authenticated requests resolve their user from the token subject through a TTL/LRU
+cache of the user's column values instead of querying the users table each time.
+On a hit the values are attached to the request's session without a SELECT, so
+handlers can keep modifying and committing `current_user` as before. Entries are
+dropped after any committed UPDATE or DELETE of a user (role changes, payments,
+unsubscribing, deletion); bulk statements that bypass the ORM must call
+`invalidate_principal` themselves.
+"""
+
+principal_cache: CacheBackend = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def set_principal_cache_backend(backend: CacheBackend) -> None:
+    """
+    Replaces the in-process principal cache, e.g. with a backend shared by all workers.
+    """
+    global principal_cache
+    principal_cache = backend
+
+
+def invalidate_principal(username: str) -> None:
+    principal_cache.delete(username)
+
+
+def _principal_snapshot(user: User) -> dict:
+    return {key: getattr(user, key) for key in _USER_COLUMNS}
+
+
+def _detached_principal(snapshot: dict) -> User:
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_principal_invalidation(mapper, connection, target):
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("stale_principals", set()).add(target.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for username in session.info.pop("stale_principals", ()):
+        invalidate_principal(username)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_queued_principals(session, previous_transaction):
+    session.info.pop("stale_principals", None)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    username = get_token_subject(token)
+
+    snapshot = principal_cache.get(username)
+    if snapshot is not None:
+        return db.merge(_detached_principal(snapshot), load=False)
 
     user = db.query(User).filter(User.username == username).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    principal_cache.set(username, _principal_snapshot(user))
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    username = get_token_subject(token)
+
+    snapshot = principal_cache.get(username)
+    if snapshot is not None:
+        return await db.merge(_detached_principal(snapshot), load=False)
+
+    user = await db.scalar(select(User).where(User.username == username))
+    if user is None:
+        raise _credentials_exception()
 
+    principal_cache.set(username, _principal_snapshot(user))
     return user
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Load-test and benchmark harness for the backend API.
+
+    python -m benchmarks.run --database-url sqlite:///./bench.db --output results/base.json
+    python -m benchmarks.compare results/base.json results/new.json
+
+See `benchmarks.run` for the available options.
+"""
@@ -0,0 +1,78 @@
+"""
+Compares two result files written by `benchmarks.run`.
+
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold PERCENT]
+
+Prints the p95 latency and throughput change of every endpoint present in both
+runs, and exits with status 1 if any endpoint's p95 grew, or its throughput
+dropped, by more than the threshold (10% by default).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(baseline: float, candidate: float) -> float:
+    if baseline == 0:
+        return 0.0
+    return (candidate - baseline) / baseline * 100
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """
+    Returns one row per endpoint measured in both runs, flagged when it regressed.
+    """
+    rows = []
+    for name, scenario in baseline["scenarios"].items():
+        other = candidate["scenarios"].get(name)
+        if other is None:
+            continue
+        for label, before in scenario["endpoints"].items():
+            after = other["endpoints"].get(label)
+            if after is None:
+                continue
+            p95_change = _change(before["p95_ms"], after["p95_ms"])
+            rps_change = _change(before["throughput_rps"], after["throughput_rps"])
+            rows.append({
+                "scenario": name,
+                "endpoint": label,
+                "p95_before": before["p95_ms"],
+                "p95_after": after["p95_ms"],
+                "p95_change": p95_change,
+                "rps_change": rps_change,
+                "regressed": p95_change > threshold or rps_change < -threshold,
+            })
+    return rows
+
+
+def print_rows(rows: list):
+    print(f"{'scenario':<16}{'endpoint':<42}{'p95 before':>12}{'p95 after':>12}{'p95':>9}{'rps':>9}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<16}{row['endpoint']:<42}{row['p95_before']:>12.1f}{row['p95_after']:>12.1f}"
+            f"{row['p95_change']:>+8.1f}%{row['rps_change']:>+8.1f}%{'  REGRESSION' if row['regressed'] else ''}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent.")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    rows = compare(baseline, candidate, args.threshold)
+    print_rows(rows)
+
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} endpoint(s) regressed by more than {args.threshold:g}%.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
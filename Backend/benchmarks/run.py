@@ -0,0 +1,278 @@
+"""
+Seeds a dataset, starts the API under uvicorn and runs the scenarios against it.
+
+    python -m benchmarks.run [--database-url URL] [--db-mode sync|async|both] [--workers N]
+                             [--scenarios login_storm,dashboard,...] [--concurrency N]
+                             [--duration SECONDS] [--output FILE]
+
+Run from the backend directory. Every scenario first runs for --warmup seconds
+unrecorded, then for --duration seconds with every request recorded. Latency
+percentiles and throughput are printed per endpoint and, with --output, saved as
+JSON for `benchmarks.compare`. Pass --base-url to benchmark a server that is
+already running against --database-url instead of starting one (add --no-seed
+to keep its data).
+
+With --db-mode both the dataset is seeded and the server started once per mode,
+sync first, and the async run is then compared with the sync one; --output FILE
+writes FILE with `.sync` and `.async` inserted before the extension.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SETUP_LOGIN_CONCURRENCY = 10
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def summarize(recorder, duration: float) -> dict:
+    endpoints = {}
+    for label, samples in sorted(recorder.samples.items()):
+        samples = sorted(samples)
+        endpoints[label] = {
+            "count": len(samples),
+            "errors": recorder.errors.get(label, 0),
+            "throughput_rps": len(samples) / duration,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+    requests = sum(endpoint["count"] for endpoint in endpoints.values())
+    return {
+        "duration_seconds": duration,
+        "requests": requests,
+        "throughput_rps": requests / duration,
+        "endpoints": endpoints,
+    }
+
+
+async def run_scenario(base_url: str, dataset, scenario, args) -> dict:
+    from benchmarks.scenarios import Recorder, VirtualUser
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        users = [
+            VirtualUser(index % dataset.config.users + 1, random.Random(args.random_seed + index))
+            for index in range(args.concurrency)
+        ]
+        if scenario.needs_login:
+            from benchmarks.scenarios import login
+            setup = Recorder()
+            # Unrecorded; bounded so that hundreds of simultaneous password checks do not
+            # exhaust the server's connection pool before the scenario starts.
+            slots = asyncio.Semaphore(SETUP_LOGIN_CONCURRENCY)
+
+            async def setup_login(user):
+                async with slots:
+                    await login(client, dataset, user, setup)
+
+            await asyncio.gather(*(setup_login(user) for user in users))
+            users = [user for user in users if user.headers]
+            if not users:
+                raise RuntimeError(f"{scenario.name}: no virtual user could log in")
+
+        async def drive(recorder, seconds: float):
+            deadline = time.perf_counter() + seconds
+
+            async def loop(user):
+                while time.perf_counter() < deadline:
+                    await scenario.step(client, dataset, user, recorder)
+
+            await asyncio.gather(*(loop(user) for user in users))
+
+        await drive(Recorder(), args.warmup)
+        recorder = Recorder()
+        start = time.perf_counter()
+        await drive(recorder, args.duration)
+        return summarize(recorder, time.perf_counter() - start)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, db_mode: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    # Every virtual user connects from 127.0.0.1, which the login limits would throttle to a trickle.
+    env = dict(os.environ, DATABASE_URL=args.database_url, DB_MODE=db_mode, RATE_LIMIT_ENABLED="false")
+    env.setdefault("SECRET_KEY", "benchmark-secret-key")
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/openapi.json", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60 seconds")
+
+
+def print_results(results: dict):
+    header = f"{'endpoint':<42}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    for name, scenario in results["scenarios"].items():
+        print(f"\n{name}: {scenario['requests']} requests, {scenario['throughput_rps']:.1f} req/s")
+        print(header)
+        for label, endpoint in scenario["endpoints"].items():
+            print(
+                f"{label:<42}{endpoint['count']:>8}{endpoint['errors']:>6}{endpoint['throughput_rps']:>9.1f}"
+                f"{endpoint['p50_ms']:>9.1f}{endpoint['p95_ms']:>9.1f}{endpoint['p99_ms']:>9.1f}"
+            )
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--db-mode", choices=("sync", "async", "both"), default="sync")
+    parser.add_argument("--base-url", help="Benchmark an already running server instead of starting one.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--no-seed", action="store_true", help="Keep the existing data (the dataset options must match it).")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects-per-user", type=int, default=5)
+    parser.add_argument("--tasks-per-project", type=int, default=20)
+    parser.add_argument("--participants-per-project", type=int, default=3)
+    parser.add_argument("--scenarios", default="login_storm,dashboard,project_list,task_toggling,user_search")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users per scenario.")
+    parser.add_argument("--duration", type=float, default=15, help="Recorded seconds per scenario.")
+    parser.add_argument("--warmup", type=float, default=3, help="Unrecorded seconds before each scenario.")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds.")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+    if args.db_mode == "both" and args.base_url:
+        parser.error("--db-mode both starts its own servers and cannot be combined with --base-url")
+
+    # app.database reads DATABASE_URL on import.
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import SeedConfig
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    config = SeedConfig(
+        users=args.users,
+        projects_per_user=args.projects_per_user,
+        tasks_per_project=args.tasks_per_project,
+        participants_per_project=args.participants_per_project,
+        random_seed=args.random_seed,
+    )
+    modes = ("sync", "async") if args.db_mode == "both" else (args.db_mode,)
+    runs = {mode: run_mode(args, mode, names, config) for mode in modes}
+
+    for mode, results in runs.items():
+        if len(runs) > 1:
+            print(f"\n== DB_MODE={mode} ==")
+        print_results(results)
+        if args.output:
+            output = Path(args.output)
+            if len(runs) > 1:
+                output = output.with_name(f"{output.stem}.{mode}{output.suffix}")
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(results, indent=2))
+            print(f"\nResults written to {output}")
+
+    if len(runs) > 1:
+        from benchmarks.compare import compare, print_rows
+
+        print("\n== async compared with sync ==")
+        print_rows(compare(runs["sync"], runs["async"], threshold=float("inf")))
+
+
+def run_mode(args, db_mode: str, names: List[str], config) -> dict:
+    """
+    Seeds the dataset, starts a server in `db_mode` unless --base-url is given, and runs the scenarios.
+    """
+    from app.database import create_db_engine
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import Dataset, seed
+
+    if args.no_seed:
+        dataset = Dataset(config)
+    else:
+        engine = create_db_engine(args.database_url)
+        started = time.perf_counter()
+        dataset = seed(engine, config)
+        engine.dispose()
+        print(f"Seeded {config.users} users in {time.perf_counter() - started:.1f}s")
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_server(args, db_mode)
+    try:
+        results = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "database": args.database_url.split(":", 1)[0],
+                "db_mode": db_mode,
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "duration_seconds": args.duration,
+                "dataset": config.as_dict(),
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            results["scenarios"][name] = asyncio.run(run_scenario(base_url, dataset, SCENARIOS[name], args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Scripted workloads.
+
+Each scenario is an async function run concurrently by every virtual user. It
+receives the shared `httpx.AsyncClient`, the seeded `Dataset`, the virtual
+user's seeded user id and a `Recorder`, and performs one iteration of its
+workload. Requests are labelled with their route template so that results
+aggregate per endpoint rather than per URL.
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def request(self, client, label: str, method: str, url: str, expected=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            response = None
+        elapsed = time.perf_counter() - start
+        self.samples.setdefault(label, []).append(elapsed)
+        if response is None or response.status_code not in expected:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            return None
+        return response
+
+
+class VirtualUser:
+    def __init__(self, user_id: int, rng: random.Random):
+        self.user_id = user_id
+        self.rng = rng
+        self.headers: Optional[dict] = None
+
+
+async def login(client, dataset, user: VirtualUser, recorder: Recorder) -> bool:
+    response = await recorder.request(
+        client, "POST /auth/login", "POST", "/auth/login",
+        json={"email": dataset.email(user.user_id), "password": dataset.password},
+        expected=(200, 503),
+    )
+    if response is None or response.status_code != 200:
+        return False
+    user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return True
+
+
+async def login_storm(client, dataset, user: VirtualUser, recorder: Recorder):
+    """
+    Every iteration is a full password login (bcrypt verification).
+    """
+    await login(client, dataset, user, recorder)
+
+
+async def dashboard(client, dataset, user: VirtualUser, recorder: Recorder):
+    """
+    What the dashboard page loads: subscription status and the project summaries.
+    """
+    await recorder.request(client, "GET /subscription/status", "GET", "/subscription/status", headers=user.headers)
+    await recorder.request(client, "GET /projects/summary", "GET", "/projects/summary", headers=user.headers)
+
+
+async def project_list(client, dataset, user: VirtualUser, recorder: Recorder):
+    """
+    The full project listing with nested tasks and participants.
+    """
+    await recorder.request(client, "GET /projects/", "GET", "/projects/", headers=user.headers)
+
+
+async def task_toggling(client, dataset, user: VirtualUser, recorder: Recorder):
+    """
+    Opens one of the user's projects and flips the status of one of its tasks.
+    """
+    project_id = user.rng.choice(dataset.owned_projects(user.user_id))
+    response = await recorder.request(
+        client, "GET /tasks/", "GET", "/tasks/", params={"project_id": project_id}, headers=user.headers
+    )
+    if response is None or not response.json():
+        return
+    task = user.rng.choice(response.json())
+    await recorder.request(
+        client, "PUT /tasks/{task_id}/status", "PUT", f"/tasks/{task['id']}/status",
+        params={"is_completed": str(not task["is_completed"]).lower()}, headers=user.headers,
+    )
+
+
+async def user_search(client, dataset, user: VirtualUser, recorder: Recorder):
+    """
+    Types a partial username into the invite box of one of the user's projects.
+    """
+    project_id = user.rng.choice(dataset.owned_projects(user.user_id))
+    target = dataset.username(user.rng.randint(1, dataset.config.users))
+    query = target[:user.rng.randint(2, len(target))]
+    await recorder.request(
+        client, "GET /projects/{project_id}/search_users", "GET", f"/projects/{project_id}/search_users",
+        params={"query": query}, headers=user.headers,
+    )
+
+
+class Scenario:
+    def __init__(self, name: str, step: Callable, needs_login: bool = True):
+        self.name = name
+        self.step = step
+        self.needs_login = needs_login
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("login_storm", login_storm, needs_login=False),
+        Scenario("dashboard", dashboard),
+        Scenario("project_list", project_list),
+        Scenario("task_toggling", task_toggling),
+        Scenario("user_search", user_search),
+    )
+}
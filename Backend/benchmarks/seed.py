@@ -0,0 +1,134 @@
+"""
+Deterministic dataset for the benchmarks.
+
+Rows are written with bulk Core inserts into a freshly created schema, so ids
+are predictable: user `n` (1-based) owns projects `(n - 1) * projects_per_user + 1`
+to `n * projects_per_user`, and the tasks of each project are contiguous. The
+scenarios rely on this instead of querying the database.
+"""
+
+import random
+from sqlalchemy import insert
+from app import migrations, models, utils
+from app.database import Base
+
+PASSWORD = "benchmark-password"
+BATCH_SIZE = 5000
+
+
+class SeedConfig:
+    def __init__(
+        self,
+        users: int = 200,
+        projects_per_user: int = 5,
+        tasks_per_project: int = 20,
+        participants_per_project: int = 3,
+        completed_ratio: float = 0.3,
+        random_seed: int = 1,
+    ):
+        self.users = users
+        self.projects_per_user = projects_per_user
+        self.tasks_per_project = tasks_per_project
+        self.participants_per_project = min(participants_per_project, max(users - 1, 0))
+        self.completed_ratio = completed_ratio
+        self.random_seed = random_seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class Dataset:
+    """
+    Ids and credentials of the seeded rows, as seen by the scenarios.
+    """
+
+    def __init__(self, config: SeedConfig):
+        self.config = config
+        self.password = PASSWORD
+
+    def email(self, user_id: int) -> str:
+        return f"user{user_id}@bench.example.com"
+
+    def username(self, user_id: int) -> str:
+        return f"user{user_id}"
+
+    def owned_projects(self, user_id: int) -> range:
+        first = (user_id - 1) * self.config.projects_per_user + 1
+        return range(first, first + self.config.projects_per_user)
+
+    def project_tasks(self, project_id: int) -> range:
+        first = (project_id - 1) * self.config.tasks_per_project + 1
+        return range(first, first + self.config.tasks_per_project)
+
+
+def _insert_batches(connection, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+def seed(engine, config: SeedConfig) -> Dataset:
+    """
+    Drops every table on `engine`, migrates it from scratch and fills it according to `config`.
+    """
+    rng = random.Random(config.random_seed)
+    with engine.begin() as connection:
+        Base.metadata.drop_all(bind=connection)
+        migrations.drop_schema_migrations(connection)
+    migrations.migrate(engine, log=lambda message: None)
+
+    # One hash for everybody: hashing every seeded user would dominate the seeding time.
+    hashed_password = utils.hash_password(PASSWORD)
+    dataset = Dataset(config)
+
+    users = [
+        {
+            "id": user_id,
+            "username": dataset.username(user_id),
+            "email": dataset.email(user_id),
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "role": "user",
+            "is_subscribed": True,
+        }
+        for user_id in range(1, config.users + 1)
+    ]
+
+    projects, tasks, memberships = [], [], []
+    for user_id in range(1, config.users + 1):
+        for project_id in dataset.owned_projects(user_id):
+            completed = 0
+            for task_id in dataset.project_tasks(project_id):
+                is_completed = rng.random() < config.completed_ratio
+                completed += is_completed
+                tasks.append({
+                    "id": task_id,
+                    "title": f"Task {task_id}",
+                    "description": f"Benchmark task {task_id} of project {project_id}",
+                    "is_completed": is_completed,
+                    "project_id": project_id,
+                })
+            projects.append({
+                "id": project_id,
+                "title": f"Project {project_id}",
+                "description": f"Benchmark project {project_id} of {dataset.username(user_id)}",
+                "owner_id": user_id,
+                "task_count": config.tasks_per_project,
+                "completed_count": completed,
+            })
+            candidates = rng.sample(range(1, config.users + 1), min(config.participants_per_project + 1, config.users))
+            participants = [other for other in candidates if other != user_id][:config.participants_per_project]
+            for participant_id in participants:
+                memberships.append({"project_id": project_id, "user_id": participant_id})
+
+    with engine.begin() as connection:
+        _insert_batches(connection, models.User.__table__, users)
+        _insert_batches(connection, models.Project.__table__, projects)
+        _insert_batches(connection, models.Task.__table__, tasks)
+        _insert_batches(connection, models.project_users, memberships)
+        if engine.dialect.name == "postgresql":
+            # Explicit ids do not advance the sequences; later inserts from the API would collide.
+            for table in ("users", "projects", "tasks"):
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                )
+    return dataset
@@ -0,0 +1,72 @@
+"""
+Shared fixtures. The application reads its settings at import time, so the
+environment is set up here, before `app` is imported: a scratch SQLite primary,
+a second SQLite file standing in for its read replica, and no rate limiting.
+"""
+
+import os
+import shutil
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="backend-tests-")
+PRIMARY_PATH = os.path.join(_data_dir, "primary.db")
+REPLICA_PATH = os.path.join(_data_dir, "replica.db")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{PRIMARY_PATH}",
+    REPLICA_DATABASE_URLS=f"sqlite:///{REPLICA_PATH}",
+    SECRET_KEY="test-secret-key",
+    RATE_LIMIT_ENABLED="false",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from app import database, migrations, models
+from app.cache import TTLCache
+from app.main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrations.migrate(database.engine, log=lambda message: None)
+    replicate()
+    yield
+    shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_writers():
+    # Every test starts with no recent writer pinned to the primary.
+    database.set_recent_writers_backend(TTLCache(maxsize=1000, ttl=database.REPLICA_READ_YOUR_WRITES_SECONDS))
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: the lifespan's background sweepers are not needed.
+    return TestClient(app)
+
+
+def replica_engine():
+    return database.replica_router.replicas[0].engine
+
+
+def replicate():
+    """
+    Brings the replica up to date with the primary by copying the database file.
+    """
+    replica_engine().dispose()
+    shutil.copyfile(PRIMARY_PATH, REPLICA_PATH)
+
+
+def signup(client: TestClient, username: str) -> dict:
+    """
+    Registers a subscribed user and returns the Authorization header of their token.
+    """
+    credentials = {"email": f"{username}@example.com", "password": "password"}
+    response = client.post("/auth/register", json={"username": username, **credentials})
+    assert response.status_code == 200, response.text
+    with database.SessionLocal() as db:
+        db.query(models.User).filter(models.User.username == username).update({"is_subscribed": True})
+        db.commit()
+    token = client.post("/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
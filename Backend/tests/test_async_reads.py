@@ -0,0 +1,52 @@
+"""
+The DB_MODE=async task list, served through aiosqlite against the test primary.
+"""
+
+import os
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app import database, projectcache
+from app.routers import async_reads
+from tests.conftest import signup
+
+
+def _async_client():
+    engine = database.create_async_db_engine(database.to_async_url(os.environ["DATABASE_URL"]))
+    sessions = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def get_async_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_reads.tasks_router, prefix="/tasks")
+    app.dependency_overrides[database.get_async_db] = get_async_db
+    return engine, TestClient(app)
+
+
+def test_async_task_list_shares_the_project_cache(client):
+    owner = signup(client, "async-owner")
+    project_id = client.post("/projects/", json={"title": "async", "description": None}, headers=owner).json()["id"]
+    client.post("/tasks/", json={"title": "first", "description": None, "project_id": project_id}, headers=owner)
+
+    engine, async_client = _async_client()
+    with async_client:
+        response = async_client.get("/tasks/", params={"project_id": project_id}, headers=owner)
+        assert response.status_code == 200, response.text
+        assert [task["title"] for task in response.json()] == ["first"]
+
+        # The sync route reads the entry the async route stored.
+        hits = projectcache.project_cache.stats()["hits"]
+        synced = client.get("/tasks/", params={"project_id": project_id}, headers={**owner, "X-Read-Consistency": "primary"})
+        assert synced.content == response.content
+        assert projectcache.project_cache.stats()["hits"] >= hits + 2
+
+        # A write through the sync app invalidates what the async route serves.
+        client.post("/tasks/", json={"title": "second", "description": None, "project_id": project_id}, headers=owner)
+        response = async_client.get("/tasks/", params={"project_id": project_id}, headers=owner)
+        assert [task["title"] for task in response.json()] == ["first", "second"]
+
+        stranger = signup(client, "async-stranger")
+        assert async_client.get("/tasks/", params={"project_id": 999999}, headers=stranger).status_code == 404
+        async_client.portal.call(engine.dispose)
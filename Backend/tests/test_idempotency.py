@@ -0,0 +1,131 @@
+"""
+Storing and replaying responses of requests carrying an Idempotency-Key.
+"""
+
+import asyncio
+import httpx
+import pytest
+from app import database, idempotency, models
+from app.cache import TTLCache
+from app.idempotency import IDEMPOTENT_REPLAYED_HEADER, IdempotencyMiddleware
+from app.utils import invalidate_principal
+from tests.conftest import signup
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    idempotency.set_idempotency_backend(TTLCache(maxsize=100, ttl=60))
+
+
+class _CountingApp:
+    """
+    ASGI app answering every request with `status`, optionally after `release` is set.
+    """
+
+    def __init__(self, status: int, release: asyncio.Event = None):
+        self.status = status
+        self.release = release
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await receive()
+        if self.release is not None:
+            await self.release.wait()
+        body = str(self.calls).encode()
+        await send({"type": "http.response.start", "status": self.status, "headers": [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _post(app, count: int = 2, release: asyncio.Event = None):
+    async def run():
+        transport = httpx.ASGITransport(app=IdempotencyMiddleware(app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def post():
+                return await client.post("/tasks/", json={"title": "task"}, headers={"Idempotency-Key": "key"})
+
+            pending = [asyncio.ensure_future(post()) for _ in range(count)]
+            if release is not None:
+                await asyncio.sleep(0.05)
+                release.set()
+            return await asyncio.gather(*pending)
+
+    return asyncio.run(run())
+
+
+def test_retry_is_replayed_from_the_store(client):
+    owner = signup(client, "idempotent-owner")
+    headers = {**owner, "Idempotency-Key": "create-project"}
+    payload = {"title": "once", "description": None}
+
+    first = client.post("/projects/", json=payload, headers=headers)
+    second = client.post("/projects/", json=payload, headers=headers)
+
+    assert first.status_code == 200, first.text
+    assert second.json() == first.json()
+    assert second.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+    assert IDEMPOTENT_REPLAYED_HEADER not in first.headers
+    with database.SessionLocal() as db:
+        assert db.query(models.Project).filter(models.Project.title == "once").count() == 1
+
+
+def test_reusing_a_key_with_another_body_is_rejected(client):
+    owner = signup(client, "idempotent-reuse")
+    headers = {**owner, "Idempotency-Key": "reused"}
+
+    assert client.post("/projects/", json={"title": "a", "description": None}, headers=headers).status_code == 200
+    response = client.post("/projects/", json={"title": "b", "description": None}, headers=headers)
+    assert response.status_code == 422
+    assert IDEMPOTENT_REPLAYED_HEADER not in response.headers
+
+
+def test_concurrent_duplicates_run_the_handler_once():
+    app = _CountingApp(201, release=asyncio.Event())
+
+    responses = _post(app, count=3, release=app.release)
+
+    assert app.calls == 1
+    assert [response.status_code for response in responses] == [201, 201, 201]
+    assert [response.headers.get(IDEMPOTENT_REPLAYED_HEADER) for response in responses] == [None, "true", "true"]
+
+
+@pytest.mark.parametrize("status_code", [200, 201, 400, 422])
+def test_final_responses_are_stored(status_code):
+    app = _CountingApp(status_code)
+
+    first, second = _post(app)
+
+    assert app.calls == 1
+    assert second.status_code == status_code
+    assert second.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+
+
+@pytest.mark.parametrize("status_code", [401, 402, 403, 404, 409, 429, 500, 503])
+def test_responses_that_may_change_are_not_stored(status_code):
+    app = _CountingApp(status_code)
+
+    first, second = _post(app)
+
+    assert app.calls == 2
+    assert second.status_code == status_code
+    assert IDEMPOTENT_REPLAYED_HEADER not in second.headers
+
+
+def test_retry_after_a_forbidden_attempt_runs_again(client):
+    owner = signup(client, "idempotent-lapsed")
+    with database.SessionLocal() as db:
+        db.query(models.User).filter(models.User.username == "idempotent-lapsed").update({"is_subscribed": False})
+        db.commit()
+    invalidate_principal("idempotent-lapsed")
+    headers = {**owner, "Idempotency-Key": "after-subscribing"}
+    payload = {"title": "later", "description": None}
+
+    assert client.post("/projects/", json=payload, headers=headers).status_code == 403
+
+    with database.SessionLocal() as db:
+        db.query(models.User).filter(models.User.username == "idempotent-lapsed").update({"is_subscribed": True})
+        db.commit()
+    invalidate_principal("idempotent-lapsed")
+    response = client.post("/projects/", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    assert IDEMPOTENT_REPLAYED_HEADER not in response.headers
@@ -0,0 +1,57 @@
+"""
+SQL statement budgets of the hot read routes, enforced with `assert_max_queries`.
+"""
+
+from app import database, models
+from app.querycount import assert_max_queries
+from tests.conftest import replicate, signup
+
+
+def _user_id(username: str) -> int:
+    with database.SessionLocal() as db:
+        return db.query(models.User.id).filter(models.User.username == username).scalar()
+
+
+def _create_projects(client, headers, count: int, tasks: int = 3) -> list:
+    project_ids = []
+    for index in range(count):
+        response = client.post("/projects/", json={"title": f"project {index}", "description": None}, headers=headers)
+        assert response.status_code == 200, response.text
+        project_id = response.json()["id"]
+        for task in range(tasks):
+            client.post("/tasks/", json={"title": f"task {task}", "description": None, "project_id": project_id}, headers=headers)
+        project_ids.append(project_id)
+    return project_ids
+
+
+def test_project_list_runs_at_most_three_statements(client):
+    owner = signup(client, "budget-owner")
+    signup(client, "budget-participant")
+    participant_id = _user_id("budget-participant")
+    for project_id in _create_projects(client, owner, count=5):
+        response = client.post(f"/projects/{project_id}/add_user", json={"user_id": participant_id}, headers=owner)
+        assert response.status_code == 200, response.text
+    replicate()
+    # Loads the caller into the principal cache.
+    client.get("/projects/summary", headers=owner)
+
+    with assert_max_queries(3):
+        response = client.get("/projects/", headers=owner)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert all(len(project["tasks"]) == 3 and len(project["participants"]) == 1 for project in response.json())
+
+
+def test_warm_project_detail_runs_at_most_one_statement(client):
+    headers = signup(client, "budget-reader")
+    project_id, = _create_projects(client, headers, count=1)
+    replicate()
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 200
+
+    # Only the participants' version check; access and body come from the project cache.
+    with assert_max_queries(1):
+        response = client.get(f"/projects/{project_id}", headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["tasks"]) == 3
@@ -0,0 +1,89 @@
+"""
+Token buckets of `InMemoryRateLimiter` and their enforcement by `RateLimit` policies.
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app import ratelimit
+from app.ratelimit import InMemoryRateLimiter, Limit, RateLimit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limited_client(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    ratelimit.set_rate_limit_backend(InMemoryRateLimiter())
+    policy = RateLimit("test", Limit("ip", per_minute=60, burst=2), Limit("email", per_minute=60, burst=1))
+    app = FastAPI()
+
+    @app.post("/limited", dependencies=[Depends(policy)])
+    def limited():
+        return {}
+
+    yield TestClient(app)
+    ratelimit.set_rate_limit_backend(InMemoryRateLimiter())
+
+
+def test_bucket_rejects_once_the_burst_is_spent(clock):
+    limiter = InMemoryRateLimiter(shards=1)
+
+    assert limiter.hit("key", rate=1, burst=2) == (True, 0.0)
+    assert limiter.hit("key", rate=1, burst=2) == (True, 0.0)
+    assert limiter.hit("key", rate=1, burst=2) == (False, 1.0)
+
+
+def test_bucket_refills_at_its_rate(clock):
+    limiter = InMemoryRateLimiter(shards=1)
+    for _ in range(2):
+        limiter.hit("key", rate=0.5, burst=2)
+
+    clock[0] += 1
+    assert limiter.hit("key", rate=0.5, burst=2) == (False, 1.0)
+    clock[0] += 1
+    assert limiter.hit("key", rate=0.5, burst=2)[0]
+
+
+def test_least_recently_used_buckets_are_evicted_over_max_keys(clock):
+    limiter = InMemoryRateLimiter(shards=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key, rate=1, burst=1)
+
+    assert limiter.stats() == {"shards": 1, "keys": 2, "evictions": 1}
+    # "a" was dropped, so it starts over with a full bucket; "c" is still empty.
+    assert limiter.hit("a", rate=1, burst=1)[0]
+    assert not limiter.hit("c", rate=1, burst=1)[0]
+
+
+def test_refilled_buckets_are_evicted(clock):
+    limiter = InMemoryRateLimiter(shards=1)
+    limiter.hit("idle", rate=1, burst=1)
+
+    clock[0] += 2
+    limiter.hit("busy", rate=1, burst=1)
+
+    assert limiter.stats()["keys"] == 1
+
+
+def test_rejected_request_gets_429_with_retry_after(limited_client):
+    assert limited_client.post("/limited", json={"email": "a@example.com"}).status_code == 200
+
+    response = limited_client.post("/limited", json={"email": "a@example.com"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_rejected_request_takes_no_tokens_from_its_other_keys(limited_client):
+    assert limited_client.post("/limited", json={"email": "a@example.com"}).status_code == 200
+    # Rejected on the email bucket; the IP bucket keeps its last token.
+    assert limited_client.post("/limited", json={"email": "a@example.com"}).status_code == 429
+
+    assert limited_client.post("/limited", json={"email": "b@example.com"}).status_code == 200
+    assert limited_client.post("/limited", json={"email": "c@example.com"}).status_code == 429
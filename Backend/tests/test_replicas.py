@@ -0,0 +1,55 @@
+"""
+Read replica routing: the replica is a copy of the primary taken by `replicate()`,
+so a read shows which database served it by whether it sees later primary writes.
+"""
+
+from app import database, models
+from tests.conftest import replicate, signup
+
+
+def _project_titles(client, headers) -> list:
+    response = client.get("/projects/", headers=headers)
+    assert response.status_code == 200, response.text
+    return [project["title"] for project in response.json()]
+
+
+def _rename_on_primary(project_id: int, title: str):
+    # Straight to the primary, so that no caller is recorded as a recent writer.
+    with database.SessionLocal() as db:
+        db.query(models.Project).filter(models.Project.id == project_id).update({"title": title})
+        db.commit()
+
+
+def _create_replicated_project(client, headers, title: str) -> int:
+    response = client.post("/projects/", json={"title": title, "description": None}, headers=headers)
+    assert response.status_code == 200, response.text
+    replicate()
+    database.recent_writers.clear()
+    return response.json()["id"]
+
+
+def test_reads_are_served_by_the_replica(client):
+    headers = signup(client, "replica-reader")
+    project_id = _create_replicated_project(client, headers, "replicated")
+    _rename_on_primary(project_id, "primary only")
+
+    assert _project_titles(client, headers) == ["replicated"]
+
+
+def test_recent_writer_reads_from_the_primary(client):
+    headers = signup(client, "replica-writer")
+    project_id = _create_replicated_project(client, headers, "replicated")
+
+    response = client.put(f"/projects/{project_id}", json={"title": "written"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    assert _project_titles(client, headers) == ["written"]
+
+
+def test_read_consistency_header_forces_the_primary(client):
+    headers = signup(client, "replica-consistent")
+    project_id = _create_replicated_project(client, headers, "replicated")
+    _rename_on_primary(project_id, "primary only")
+
+    assert _project_titles(client, {**headers, database.READ_CONSISTENCY_HEADER: "primary"}) == ["primary only"]
+    assert _project_titles(client, headers) == ["replicated"]
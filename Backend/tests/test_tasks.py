@@ -0,0 +1,87 @@
+"""
+Access rules of the task write routes.
+"""
+
+from app.constants import MAX_BULK_TASKS
+from tests.conftest import signup
+
+
+def _create_task(client, headers) -> int:
+    project = client.post("/projects/", json={"title": "tasks", "description": None}, headers=headers)
+    assert project.status_code == 200, project.text
+    task = client.post(
+        "/tasks/",
+        json={"title": "task", "description": None, "project_id": project.json()["id"]},
+        headers=headers,
+    )
+    assert task.status_code == 200, task.text
+    return task.json()["id"]
+
+
+def test_only_the_project_owner_can_update_or_delete_a_task(client):
+    owner = signup(client, "task-owner")
+    stranger = signup(client, "task-stranger")
+    task_id = _create_task(client, owner)
+    update = {"title": "renamed", "description": None, "is_completed": True}
+
+    assert client.put(f"/tasks/{task_id}", json=update, headers=stranger).status_code == 403
+    assert client.delete(f"/tasks/{task_id}", headers=stranger).status_code == 403
+
+    response = client.put(f"/tasks/{task_id}", json=update, headers=owner)
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "renamed"
+    assert client.delete(f"/tasks/{task_id}", headers=owner).status_code == 204
+
+
+def test_missing_task_is_not_found(client):
+    owner = signup(client, "task-missing")
+    update = {"title": "renamed", "description": None, "is_completed": False}
+
+    assert client.put("/tasks/999999", json=update, headers=owner).status_code == 404
+    assert client.delete("/tasks/999999", headers=owner).status_code == 404
+
+
+def test_bulk_routes_report_forbidden_and_missing_tasks_per_item(client):
+    owner = signup(client, "bulk-owner")
+    stranger = signup(client, "bulk-stranger")
+    own_task = _create_task(client, owner)
+    foreign_task = _create_task(client, stranger)
+
+    response = client.patch(
+        "/tasks/bulk/status",
+        json={"task_ids": [own_task, foreign_task, 999999], "is_completed": True},
+        headers=owner,
+    )
+    assert response.status_code == 200, response.text
+    assert [(item["id"], item["status"]) for item in response.json()] == [
+        (own_task, "updated"),
+        (foreign_task, "forbidden"),
+        (999999, "not_found"),
+    ]
+
+    response = client.request(
+        "DELETE", "/tasks/bulk", json={"task_ids": [own_task, foreign_task, 999999]}, headers=owner
+    )
+    assert response.status_code == 200, response.text
+    assert [(item["id"], item["status"]) for item in response.json()] == [
+        (own_task, "deleted"),
+        (foreign_task, "forbidden"),
+        (999999, "not_found"),
+    ]
+
+    foreign = client.get(f"/tasks/{foreign_task}", headers=stranger)
+    assert foreign.status_code == 200, foreign.text
+    assert foreign.json()["is_completed"] is False
+
+
+def test_bulk_routes_reject_more_than_max_bulk_tasks(client):
+    owner = signup(client, "bulk-cap")
+    task_ids = list(range(1, MAX_BULK_TASKS + 2))
+
+    response = client.patch("/tasks/bulk/status", json={"task_ids": task_ids, "is_completed": True}, headers=owner)
+    assert response.status_code == 422
+    response = client.request("DELETE", "/tasks/bulk", json={"task_ids": task_ids}, headers=owner)
+    assert response.status_code == 422
+    tasks = [{"title": "task", "description": None}] * (MAX_BULK_TASKS + 1)
+    response = client.post("/tasks/bulk", json={"project_id": 1, "tasks": tasks}, headers=owner)
+    assert response.status_code == 422
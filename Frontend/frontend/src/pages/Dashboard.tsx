@@ -13,12 +13,11 @@ import {
   Grid,
 } from "@mui/material";
 import {
-  getProjects,
+  getProjectSummaries,
   getSubscriptionStatus,
   searchUsers,
   addUserToProject,
   deleteProject,
-  getProjectProgress,
 } from "../services/api";
 import { useAuth } from "../context/AuthContext";
 import { Link, useNavigate } from "react-router-dom";
@@ -35,14 +34,7 @@ const Dashboard: React.FC = () => {
   const [isModalOpen, setIsModalOpen] = useState(false);
 
   const fetchProjects = async () => {
-    const projectsData = await getProjects();
-    const projectsWithProgress = await Promise.all(
-      projectsData.map(async (project: any) => {
-        const progressData = await getProjectProgress(project.id);
-        return { ...project, progress: progressData.progress };
-      })
-    );
-    setProjects(projectsWithProgress);
+    setProjects(await getProjectSummaries());
   };
 
   useEffect(() => {
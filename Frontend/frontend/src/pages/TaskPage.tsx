@@ -13,14 +13,21 @@ import {
   Divider,
   Alert,
 } from "@mui/material";
-import { getTasksByProject, createTask, updateTask, deleteTask, getSubscriptionStatus } from "../services/api";
+import {
+  getTasksByProject,
+  createTask,
+  updateTask,
+  deleteTask,
+  getSubscriptionStatus,
+  subscribeToProjectEvents,
+} from "../services/api";
 import { useParams } from "react-router-dom";
 import { Delete as DeleteIcon } from "@mui/icons-material";
 import BackButton from "./BackButton";
 
 const Tasks: React.FC = () => {
   const { projectId } = useParams<{ projectId: string }>();
-  const [tasks, setTasks] = useState([]);
+  const [tasks, setTasks] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [newTaskTitle, setNewTaskTitle] = useState("");
   const [newTaskDescription, setNewTaskDescription] = useState("");
@@ -47,6 +54,37 @@ const Tasks: React.FC = () => {
     }
   };
 
+  // Applies a change to the local task list: one pushed by GET /projects/{id}/events,
+  // or one of our own writes, whose echo on the feed is then a no-op.
+  const applyEvent = (event: any) => {
+    switch (event.type) {
+      case "task.created":
+      case "task.updated":
+        setTasks((current) => {
+          const changed = new Map(event.tasks.map((task: any) => [task.id, task]));
+          const merged = current.map((task) => changed.get(task.id) ?? task);
+          const known = new Set(current.map((task) => task.id));
+          return [...merged, ...event.tasks.filter((task: any) => !known.has(task.id))];
+        });
+        break;
+      case "task.status": {
+        const changed = new Set(event.task_ids);
+        setTasks((current) =>
+          current.map((task) => (changed.has(task.id) ? { ...task, is_completed: event.is_completed } : task))
+        );
+        break;
+      }
+      case "task.deleted": {
+        const removed = new Set(event.task_ids);
+        setTasks((current) => current.filter((task) => !removed.has(task.id)));
+        break;
+      }
+      case "resync":
+        fetchTasks();
+        break;
+    }
+  };
+
   const handleCreateTask = async () => {
     if (!subscriptionStatus?.is_subscribed) {
       setIsModalOpen(true);
@@ -54,14 +92,14 @@ const Tasks: React.FC = () => {
     }
 
     try {
-      await createTask({
+      const task = await createTask({
         title: newTaskTitle,
         description: newTaskDescription,
         project_id: Number(projectId),
       });
+      applyEvent({ type: "task.created", tasks: [task] });
       setNewTaskTitle("");
       setNewTaskDescription("");
-      fetchTasks();
     } catch (err) {
       console.error("Error creating task:", err);
     }
@@ -69,8 +107,8 @@ const Tasks: React.FC = () => {
 
   const handleToggleCompletion = async (taskId: number, isCompleted: boolean) => {
     try {
-      await updateTask(taskId, !isCompleted);
-      fetchTasks();
+      const task = await updateTask(taskId, !isCompleted);
+      applyEvent({ type: "task.updated", tasks: [task] });
     } catch (err) {
       console.error("Error updating task status:", err);
     }
@@ -79,7 +117,7 @@ const Tasks: React.FC = () => {
   const handleDeleteTask = async (taskId: number) => {
     try {
       await deleteTask(taskId);
-      fetchTasks();
+      applyEvent({ type: "task.deleted", task_ids: [taskId] });
     } catch (err) {
       console.error("Error deleting task:", err);
     }
@@ -88,6 +126,7 @@ const Tasks: React.FC = () => {
   useEffect(() => {
     fetchTasks();
     fetchSubscriptionStatus();
+    return subscribeToProjectEvents(Number(projectId), applyEvent);
   }, [projectId]);
 
   if (loading) {
@@ -17,6 +17,17 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+const fetchAllPages = async (url: string, params: object = {}) => {
+  const items: any[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get(url, { params: { ...params, cursor } });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return items;
+};
+
 export const registerUser = async (userData: { username: string; email: string; password: string }) => {
   const response = await api.post('/auth/register', userData);
   return response.data;
@@ -29,8 +40,11 @@ export const loginUser = async (credentials: { email: string; password: string }
 
 
 export const getProjects = async () => {
-  const response = await api.get('/projects');
-  return response.data;
+  return fetchAllPages('/projects');
+};
+
+export const getProjectSummaries = async () => {
+  return fetchAllPages('/projects/summary');
 };
 
 export const getProjectProgress = async (projectId: number) => {
@@ -38,6 +52,14 @@ export const getProjectProgress = async (projectId: number) => {
   return response.data;
 };
 
+export const getProjectsProgress = async (projectIds?: number[]) => {
+  const response = await api.get('/projects/progress', {
+    params: { ids: projectIds },
+    paramsSerializer: { indexes: null },
+  });
+  return response.data;
+};
+
 export const createProject = async (projectData: object) => {
   const response = await api.post('/projects', projectData);
   return response.data;
@@ -76,8 +98,7 @@ export const removeUserFromProject = async (projectId: number, userId: number) =
 };
 
 export const getTasksByProject = async (projectId: number) => {
-    const response = await api.get(`/tasks?project_id=${projectId}`);
-    return response.data;
+    return fetchAllPages('/tasks', { project_id: projectId });
   };
 
   
@@ -98,6 +119,24 @@ export const getTasksByProject = async (projectId: number) => {
     return response.data;
   };
 
+  export const createTasksBulk = async (
+    projectId: number,
+    tasks: { title: string; description?: string | null; is_completed?: boolean }[]
+  ) => {
+    const response = await api.post('/tasks/bulk', { project_id: projectId, tasks });
+    return response.data;
+  };
+
+  export const updateTasksStatusBulk = async (taskIds: number[], isCompleted: boolean) => {
+    const response = await api.patch('/tasks/bulk/status', { task_ids: taskIds, is_completed: isCompleted });
+    return response.data;
+  };
+
+  export const deleteTasksBulk = async (taskIds: number[]) => {
+    const response = await api.delete('/tasks/bulk', { data: { task_ids: taskIds } });
+    return response.data;
+  };
+
   export const subscribe = async (plan: string = "monthly") => {
     const response = await api.post('/payment/subscribe', { plan });
     return response.data;
@@ -112,6 +151,55 @@ export const getTasksByProject = async (projectId: number) => {
     const response = await api.get('/subscription/status');
     return response.data;
   };
-  
+
+  // EventSource cannot send the Authorization header, so the feed is read with fetch.
+  // Dropped or failed streams are reopened with backoff, and every reopened stream
+  // starts with a `resync` event so the caller refetches whatever it missed.
+  // Only a 4xx other than 429 (no access, project gone) stops the feed.
+  export const subscribeToProjectEvents = (projectId: number, onEvent: (event: any) => void) => {
+    const controller = new AbortController();
+    const connect = async () => {
+      let delay = 1000;
+      let reconnecting = false;
+      while (!controller.signal.aborted) {
+        try {
+          const response = await fetch(`${API_URL}/projects/${projectId}/events`, {
+            headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+            signal: controller.signal,
+          });
+          if (response.status >= 400 && response.status < 500 && response.status !== 429) return;
+          if (response.ok && response.body) {
+            if (reconnecting) onEvent({ type: 'resync', project_id: projectId });
+            delay = 1000;
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            for (;;) {
+              const { value, done } = await reader.read();
+              if (done) break;
+              buffer += value;
+              const frames = buffer.split('\n\n');
+              buffer = frames.pop() ?? '';
+              for (const frame of frames) {
+                const data = frame
+                  .split('\n')
+                  .filter((line) => line.startsWith('data: '))
+                  .map((line) => line.slice(6))
+                  .join('\n');
+                if (data) onEvent(JSON.parse(data));
+              }
+            }
+          }
+        } catch (err) {
+          if (controller.signal.aborted) return;
+        }
+        reconnecting = true;
+        await new Promise((resolve) => setTimeout(resolve, delay));
+        delay = Math.min(delay * 2, 30000);
+      }
+    };
+    connect();
+    return () => controller.abort();
+  };
+
 
 export default api;